@@ -0,0 +1,267 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from streamlit.testing.v1 import AppTest
+from create_shacl import load_property_graph
+from utils.watch import SourceFile
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = str(Path(__file__).resolve().parent / "shacl_generator.py")
+PERCENTILES = (50, 90, 95, 99)
+# Metrics compared against a baseline: the p95 rerun latency of every step and the session memory
+CHECKED_PERCENTILE = "p95"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent analyst sessions against the Streamlit app and report rerun latency and memory.")
+    parser.add_argument("--ceds", required=True, help="CEDS ontology file")
+    parser.add_argument("--extension", help="Extension ontology file")
+    parser.add_argument("--extension-namespace", help="Extension namespace URL")
+    parser.add_argument("--extension-prefix", help="Extension namespace abbreviation")
+    parser.add_argument("--property-shapes", help="Base PropertyShapes file, needed for the Constraints page")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent sessions to simulate")
+    parser.add_argument("--rounds", type=int, default=3, help="Select/edit/generate rounds per session")
+    parser.add_argument("--toggles", type=int, default=3, help="Property checkboxes toggled per round")
+    parser.add_argument("--edits", type=int, default=2, help="Constraint values edited per round")
+    parser.add_argument("--store", help="Back the sessions with the on-disk store at this path instead of memory")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds one rerun may take before the session fails")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="Report from an earlier run; fail if this run is slower or larger")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed growth over the baseline (0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+
+class Session:
+    """One simulated analyst driving the app through AppTest and timing every rerun."""
+
+    def __init__(self, number, args, property_graph, artifact_dir):
+        self.number = number
+        self.args = args
+        self.property_graph = property_graph
+        self.artifact_dir = artifact_dir
+        self.timings = []
+        self.app = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+
+    def rerun(self, step, widget=None):
+        """Rerun the app (through `widget` if given) and record how long it took."""
+        started = time.perf_counter()
+        (widget or self.app).run()
+        self.timings.append((step, time.perf_counter() - started))
+        if self.app.exception:
+            raise RuntimeError(f"Session {self.number}: {step} raised {self.app.exception[0].value}")
+
+    def go_to(self, page, step):
+        self.rerun(step, self.app.sidebar.radio[0].set_value(page))
+
+    def upload_ontologies(self):
+        """Stand in for the file uploader, which AppTest cannot drive, and load the files."""
+        files = [(SourceFile(self.args.ceds), "http://ceds.ed.gov/terms#", "ceds")]
+        if self.args.extension:
+            files.append((SourceFile(self.args.extension), self.args.extension_namespace, self.args.extension_prefix))
+        self.app.session_state["file_list"] = files
+        self.app.session_state["property_graph"] = self.property_graph
+        self.rerun("ontology_files")
+
+        started = time.perf_counter()
+        load_button = next(button for button in self.app.button if button.label == "Load Ontologies")
+        self.rerun("load_click", load_button.click())
+        while self.app.session_state["load_job"] is not None:
+            if time.perf_counter() - started > self.args.timeout:
+                raise RuntimeError(f"Session {self.number}: ontology load timed out")
+            time.sleep(0.1)
+            self.rerun("load_poll")
+        self.timings.append(("load_total", time.perf_counter() - started))
+
+    def toggle_properties(self, round_number):
+        self.go_to("Class and Property Menu", "class_menu")
+        checkboxes = [checkbox for checkbox in self.app.checkbox if checkbox.key and not checkbox.key.startswith("select_all_")]
+        if not checkboxes:
+            return
+        for offset in range(self.args.toggles):
+            # Each session starts at a different checkbox so sessions select different properties
+            checkbox = checkboxes[(self.number * self.args.toggles + round_number + offset) % len(checkboxes)]
+            checkbox = self.app.checkbox(key=checkbox.key)
+            self.rerun("toggle_property", checkbox.set_value(not checkbox.value))
+
+    def edit_constraints(self, round_number):
+        self.go_to("Constraints", "constraints_page")
+        inputs = [number_input for number_input in self.app.number_input if number_input.key]
+        for offset in range(min(self.args.edits, len(inputs))):
+            number_input = self.app.number_input(key=inputs[offset].key)
+            self.rerun("edit_constraint", number_input.set_value((number_input.value or 0) + round_number + 1))
+
+    def open_shacl(self):
+        self.go_to("SHACL", "shacl_page")
+
+    def run(self):
+        if self.args.store:
+            self.app.session_state["store_path"] = self.args.store
+        self.app.session_state["artifact_store_path"] = self.artifact_dir
+        self.rerun("open_app")
+        self.upload_ontologies()
+        for round_number in range(self.args.rounds):
+            self.toggle_properties(round_number)
+            self.edit_constraints(round_number)
+            self.open_shacl()
+        return self.timings
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-q * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(timings):
+    """Group (step, seconds) records into per-step latency statistics in milliseconds."""
+    steps = {}
+    for step, seconds in timings:
+        steps.setdefault(step, []).append(seconds * 1000)
+    summary = {}
+    for step, values in steps.items():
+        summary[step] = {"count": len(values), "max": max(values)}
+        for q in PERCENTILES:
+            summary[step][f"p{q}"] = percentile(values, q)
+    return summary
+
+
+# Set in each session process so all sessions start their first rerun together
+_start_barrier = None
+
+
+def _init_session_process(barrier):
+    global _start_barrier
+    _start_barrier = barrier
+
+
+def run_session(number, args, artifact_dir):
+    """Drive one session in its own process; return its timings, start and end time, and max RSS."""
+    session = Session(number, args, load_property_graph(args.property_shapes), artifact_dir)
+    _start_barrier.wait(timeout=args.timeout)
+    started = time.time()
+    timings = session.run()
+    return timings, started, time.time(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure_session_memory(args, artifact_dir):
+    """Run one more session under tracemalloc and return the memory it retains and its peak, in bytes.
+
+    The session runs alone in this process after the timed ones, so the figure includes
+    the caches a session process builds for itself.
+    """
+    property_graph = load_property_graph(args.property_shapes)
+    tracemalloc.start()
+    try:
+        session = Session(args.sessions, args, property_graph, artifact_dir)
+        session.run()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return retained, peak
+
+
+def run_benchmark(args):
+    """Drive the configured number of sessions at once, one process each, and return the report dictionary.
+
+    AppTest swaps a process-wide Streamlit runtime on every rerun, so sessions sharing a
+    process could not rerun at the same time. In separate processes their reruns overlap;
+    they share the on-disk ontology store (with --store) and the artifact store, but not
+    in-memory caches.
+    """
+    # A fresh artifact store per run, so SHACL generation is measured rather than earlier runs' stored results
+    with tempfile.TemporaryDirectory(prefix="benchmark-artifacts-") as artifact_dir:
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(args.sessions)
+        with ProcessPoolExecutor(
+            max_workers=args.sessions,
+            mp_context=context,
+            initializer=_init_session_process,
+            initargs=(barrier,)
+        ) as executor:
+            futures = [executor.submit(run_session, number, args, artifact_dir) for number in range(args.sessions)]
+            results = [future.result() for future in futures]
+
+        timings = [record for result in results for record in result[0]]
+        wall_time = max(result[2] for result in results) - min(result[1] for result in results)
+        retained, peak = measure_session_memory(args, artifact_dir)
+    return {
+        "sessions": args.sessions,
+        "rounds": args.rounds,
+        "wall_time_s": wall_time,
+        "reruns": sum(1 for step, _ in timings if step != "load_total"),
+        "steps": summarize(timings),
+        "session_memory_bytes": retained,
+        "session_peak_memory_bytes": peak,
+        "max_rss_kb": max(result[3] for result in results)
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """Return a message for every metric that grew more than `tolerance` over the baseline."""
+    regressions = []
+    for step, stats in report["steps"].items():
+        previous = baseline.get("steps", {}).get(step)
+        if previous is None:
+            continue
+        limit = previous[CHECKED_PERCENTILE] * (1 + tolerance)
+        if stats[CHECKED_PERCENTILE] > limit:
+            regressions.append(
+                f"{step}: {CHECKED_PERCENTILE} {stats[CHECKED_PERCENTILE]:.0f} ms > {limit:.0f} ms "
+                f"(baseline {previous[CHECKED_PERCENTILE]:.0f} ms)"
+            )
+    previous = baseline.get("session_memory_bytes")
+    if previous:
+        limit = previous * (1 + tolerance)
+        if report["session_memory_bytes"] > limit:
+            regressions.append(
+                f"session memory: {report['session_memory_bytes'] / 2**20:.1f} MiB > {limit / 2**20:.1f} MiB "
+                f"(baseline {previous / 2**20:.1f} MiB)"
+            )
+    return regressions
+
+
+def print_report(report):
+    print(f"{report['sessions']} sessions, {report['reruns']} reruns in {report['wall_time_s']:.1f}s")
+    header = "step".ljust(18) + "count".rjust(7) + "".join(f"p{q}".rjust(10) for q in PERCENTILES) + "max".rjust(10)
+    print(header)
+    for step, stats in report["steps"].items():
+        print(step.ljust(18) + str(stats["count"]).rjust(7)
+              + "".join(f"{stats[f'p{q}']:.0f}".rjust(10) for q in PERCENTILES) + f"{stats['max']:.0f}".rjust(10))
+    print(f"memory per session: {report['session_memory_bytes'] / 2**20:.1f} MiB retained, "
+          f"{report['session_peak_memory_bytes'] / 2**20:.1f} MiB peak; largest session process max RSS {report['max_rss_kb'] / 1024:.0f} MiB")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="[%(asctime)s] [%(levelname)-8s]: %(message)s")
+
+    report = run_benchmark(args)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            for regression in regressions:
+                print(f"REGRESSION {regression}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
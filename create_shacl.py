@@ -0,0 +1,246 @@
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from rdflib import Graph
+from utils.common import add_namespace, get_rdf_format
+from utils.project import load_project_file
+from utils.SHACL import (
+    namespaces,
+    initialize_graphs,
+    get_filter_class_ids_from_file,
+    build_shapes,
+    serialize_graph,
+    slice_ontology,
+    build_artifacts,
+    load_ontologies,
+    apply_ontology_update,
+    discard_ontology_update,
+    loaded_sources
+)
+from utils.watch import SourceFile, FileWatcher, IncrementalShapeBuilder
+from utils.artifacts import (
+    ArtifactStore,
+    COMPRESSION_SUFFIXES,
+    DEFAULT_MAX_AGE,
+    DEFAULT_MAX_BYTES,
+    artifact_key,
+    available_compressions,
+    compress,
+    file_digest
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate filtered SHACL shapes from the CEDS and Extension ontologies.")
+    parser.add_argument("--ceds", required=True, help="CEDS ontology file")
+    parser.add_argument("--extension", help="Extension ontology file")
+    parser.add_argument("--extension-namespace", help="Extension namespace URL")
+    parser.add_argument("--extension-prefix", help="Extension namespace abbreviation")
+    parser.add_argument("--filter", help="CSV of namespace:ClassID, namespace:PropertyID rows")
+    parser.add_argument("--project", help="Project file saved from the app (selections and constraints)")
+    parser.add_argument("--rules", help="JSON file with an ordered list of bulk constraint rules (added after any project rules)")
+    parser.add_argument("--property-shapes", help="Base PropertyShapes file used to detect custom constraints")
+    parser.add_argument("--output", default="Filtered_SHACL.ttl", help="Output SHACL file (add .gz or .zst to compress)")
+    parser.add_argument("--ntriples-output", help="Also write the shapes as N-Triples to this file")
+    parser.add_argument("--context-output", help="Also write the JSON-LD context crosswalk for the selection to this file")
+    parser.add_argument("--module-output", help="Also write a minimal ontology module for the selection to this file")
+    parser.add_argument("--bundle-output", help="Also write the shapes merged with the base property shapes they use to this file")
+    parser.add_argument("--artifact-store", help="Directory of stored artifacts; unchanged inputs are served from it without regenerating")
+    parser.add_argument("--artifact-store-max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20,
+                        help="Evict the least recently used stored artifacts beyond this size in MiB (0 = no limit)")
+    parser.add_argument("--artifact-store-max-days", type=float, default=DEFAULT_MAX_AGE / 86400,
+                        help="Evict stored artifacts not used for this many days (0 = no limit)")
+    parser.add_argument("--watch", action="store_true", help="Keep running and regenerate the outputs whenever an input file changes")
+    args = parser.parse_args(argv)
+    if not args.filter and not args.project:
+        parser.error("one of --filter or --project is required")
+    for path in requested_outputs(args).values():
+        compression = output_compression(path)
+        if compression and compression not in available_compressions():
+            parser.error(f"{path}: {compression} compression needs the zstandard package")
+    return args
+
+
+def load_property_graph(path):
+    """Parse the base PropertyShapes file, if one was given."""
+    if not path:
+        return None
+    property_graph = Graph()
+    property_graph.parse(path, format=get_rdf_format(path) or "turtle")
+    return property_graph
+
+
+def load_selection(filter_path, project_path, rules_path=None):
+    """Combine the filter CSV, project file and rules file into one selection, constraint and rule set."""
+    class_property_map, property_constraints, rules = {}, {}, []
+    if project_path:
+        project_map, property_constraints, rules = load_project_file(project_path)
+        # The filter file yields plain string URIs; keep one key type for the merge
+        class_property_map = {str(c): {str(p) for p in props} for c, props in project_map.items()}
+    if filter_path:
+        for class_uri, properties in get_filter_class_ids_from_file(filter_path).items():
+            class_property_map.setdefault(class_uri, set()).update(properties)
+    if rules_path:
+        with open(rules_path, "r", encoding="utf-8") as f:
+            rules = rules + json.load(f)
+    return class_property_map, property_constraints, rules
+
+
+# Artifacts and the option naming the file each one is written to
+OUTPUT_ARGUMENTS = {"shacl": "output", "ntriples": "ntriples_output", "context": "context_output", "bundle": "bundle_output"}
+
+
+def requested_outputs(args):
+    """Map each artifact asked for on the command line to its output path."""
+    return {name: getattr(args, option) for name, option in OUTPUT_ARGUMENTS.items() if getattr(args, option)}
+
+
+def output_compression(path):
+    """Return the compression an output path's suffix asks for (.gz or .zst), if any."""
+    return next((compression for compression, suffix in COMPRESSION_SUFFIXES.items() if str(path).endswith(suffix)), None)
+
+
+def write_file(path, data):
+    """Write bytes next to `path` and rename them into place so readers never see a partial file."""
+    path = Path(path)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+    logger.info(f"Wrote {path}")
+
+
+def write_outputs(args, g, artifacts, class_property_map):
+    """Write the requested artifacts (compressed when the path asks for it) and any ontology module."""
+    for name, path in requested_outputs(args).items():
+        compression = output_compression(path)
+        write_file(path, compress(artifacts[name], compression) if compression else artifacts[name])
+
+    if args.module_output:
+        serialize_graph(g, slice_ontology(g, class_property_map), args.module_output)
+
+
+def write_stored_outputs(args, store, key):
+    """Copy the requested artifacts, or their precompressed variants, out of the artifact store."""
+    for name, path in requested_outputs(args).items():
+        write_file(path, store.read(key, name, output_compression(path)))
+
+
+def artifact_inputs(args):
+    """Describe the input files and options that determine the artifacts, to key the artifact store."""
+    return {
+        "ceds": file_digest(args.ceds),
+        "extension": file_digest(args.extension),
+        "extension_namespace": args.extension_namespace,
+        "extension_prefix": args.extension_prefix,
+        "filter": file_digest(args.filter),
+        "project": file_digest(args.project),
+        "rules": file_digest(args.rules),
+        "property_shapes": file_digest(args.property_shapes)
+    }
+
+
+def ontology_files(args):
+    """List the ontology files with their namespaces in the form load_ontologies expects."""
+    files = [(SourceFile(args.ceds), "http://ceds.ed.gov/terms#", "ceds")]
+    if args.extension:
+        files.append((SourceFile(args.extension), args.extension_namespace, args.extension_prefix))
+    return files
+
+
+def watch(args):
+    """Keep the inputs parsed and regenerate the outputs each time one of them changes."""
+    files = ontology_files(args)
+    g = apply_ontology_update(load_ontologies(files))
+    property_graph = load_property_graph(args.property_shapes)
+    class_property_map, property_constraints, rules = load_selection(args.filter, args.project, args.rules)
+    builder = IncrementalShapeBuilder()
+
+    ontology_paths = {file.path for file, _, _ in files}
+    property_paths = {Path(args.property_shapes)} if args.property_shapes else set()
+    watcher = FileWatcher([args.ceds, args.extension, args.property_shapes, args.filter, args.project, args.rules])
+
+    def regenerate():
+        started = time.perf_counter()
+        context_terms = {}
+        shapes = builder.build(g, class_property_map, property_constraints, property_graph, context_terms, rules)
+        artifacts = build_artifacts(shapes, context_terms, property_graph, requested_outputs(args))
+        write_outputs(args, g, artifacts, class_property_map)
+        logger.info(f"Regenerated {args.output} in {time.perf_counter() - started:.2f}s")
+
+    regenerate()
+    logger.info("Watching the input files for changes; press Ctrl+C to stop.")
+    try:
+        while True:
+            changed = watcher.wait()
+            logger.info(f"Changed: {', '.join(sorted(path.name for path in changed))}")
+            try:
+                if changed & ontology_paths:
+                    update = load_ontologies(files, g)
+                    if len(update["sources"]) < len(files):
+                        discard_ontology_update(update)
+                        raise ValueError("an ontology file could not be parsed")
+                    stale = [Graph(store=g.store, identifier=source_id)
+                             for source_id in loaded_sources(g) if source_id not in update["sources"]]
+                    builder.invalidate(stale + list(update["added"].values()))
+                    g = apply_ontology_update(update)
+                if changed & property_paths:
+                    previous_property_graph = property_graph
+                    property_graph = load_property_graph(args.property_shapes)
+                    builder.invalidate_property_shapes(previous_property_graph, property_graph)
+                if changed - ontology_paths - property_paths:
+                    class_property_map, property_constraints, rules = load_selection(args.filter, args.project, args.rules)
+                regenerate()
+            except Exception as e:
+                logger.exception(f"Failed to regenerate, keeping the previous output: {e}")
+    except KeyboardInterrupt:
+        logger.info("Stopped watching.")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)-8s]: %(message)s")
+
+    add_namespace(namespaces, "ceds", "http://ceds.ed.gov/terms#")
+    if args.extension_prefix and args.extension_namespace:
+        add_namespace(namespaces, args.extension_prefix, args.extension_namespace)
+
+    if args.watch:
+        watch(args)
+        return
+
+    store = key = None
+    if args.artifact_store:
+        store = ArtifactStore(
+            args.artifact_store,
+            max_bytes=int(args.artifact_store_max_mb * 2**20) or None,
+            max_age=args.artifact_store_max_days * 86400 or None
+        )
+        key = artifact_key(artifact_inputs(args))
+        # The ontology module is not stored, so it still needs the parsed ontology
+        if not args.module_output and store.lookup(key) is not None:
+            logger.info(f"Inputs unchanged; serving artifacts {key[:12]} from {args.artifact_store}")
+            write_stored_outputs(args, store, key)
+            return
+
+    g, _ = initialize_graphs(args.ceds, args.extension)
+    property_graph = load_property_graph(args.property_shapes)
+    class_property_map, property_constraints, rules = load_selection(args.filter, args.project, args.rules)
+
+    context_terms = {}
+    shapes = build_shapes(g, class_property_map, property_constraints, property_graph, context_terms, rules)
+    if store is not None:
+        store.get_or_create(key, lambda: build_artifacts(shapes, context_terms, property_graph))
+        write_stored_outputs(args, store, key)
+        if args.module_output:
+            serialize_graph(g, slice_ontology(g, class_property_map), args.module_output)
+    else:
+        write_outputs(args, g, build_artifacts(shapes, context_terms, property_graph, requested_outputs(args)), class_property_map)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import streamlit as st
-from rdflib import Graph
+from pathlib import Path
 from utils.SHACL import (
     display_classes_and_properties,
     ontology_manager,
     show_SHACL,
-    display_constraints
+    display_constraints,
+    open_combined_graph,
+    apply_finished_load_job,
+    DEFAULT_STORE_PATH
 )
 
 
@@ -19,8 +22,10 @@ def app():
     # Initialize session state variables
     if "file_list" not in st.session_state:
         st.session_state.file_list = []
+    if "store_path" not in st.session_state:
+        st.session_state.store_path = DEFAULT_STORE_PATH if Path(DEFAULT_STORE_PATH).exists() else None
     if "combined_graph" not in st.session_state:
-        st.session_state.combined_graph = Graph()
+        st.session_state.combined_graph = open_combined_graph(st.session_state.store_path)
     if "class_property_map" not in st.session_state:
         st.session_state.class_property_map = {}
     if "SHACL_content" not in st.session_state:
@@ -30,6 +35,8 @@ def app():
     if "property_constraints" not in st.session_state:
         st.session_state.property_constraints = {}
 
+    # Pick up a background ontology load that finished since the last rerun
+    apply_finished_load_job()
 
     page = st.sidebar.radio("Go to", ["Ontology Files", "Class and Property Menu", "Constraints", "SHACL"])
 
@@ -0,0 +1,69 @@
+import pytest
+from rdflib import Graph, Namespace
+
+import utils.SHACL as SHACL
+
+CEDS = Namespace("http://ceds.ed.gov/terms#")
+
+ONTOLOGY = """
+@prefix ceds: <http://ceds.ed.gov/terms#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+@prefix skos: <http://www.w3.org/2004/02/skos/core#> .
+@prefix schema: <https://schema.org/> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+
+ceds:C200000 a rdfs:Class ; rdfs:label "Thing" ; skos:notation "Thing" .
+ceds:C200377 a rdfs:Class ; rdfs:label "Person Name" ; skos:notation "PersonName" ; rdfs:subClassOf ceds:C200000 .
+ceds:C200275 a rdfs:Class ; rdfs:label "Person" ; skos:notation "Person" ; rdfs:subClassOf ceds:C200000 .
+ceds:C000255 a rdfs:Class ; rdfs:label "Sex" ; skos:notation "Sex" .
+ceds:NI000255001 a ceds:C000255, owl:NamedIndividual ; rdfs:label "Female" ; skos:notation "Female" .
+ceds:NI000255002 a ceds:C000255, owl:NamedIndividual ; rdfs:label "Male" ; skos:notation "Male" .
+ceds:P000115 a rdf:Property ; rdfs:label "First Name" ; skos:notation "FirstName" ;
+    schema:domainIncludes ceds:C200377 ; schema:rangeIncludes xsd:string .
+ceds:P000172 a rdf:Property ; rdfs:label "Last Name" ; skos:notation "LastOrSurname" ;
+    schema:domainIncludes ceds:C200377 ; schema:rangeIncludes xsd:string .
+ceds:P000255 a rdf:Property ; rdfs:label "Sex" ; skos:notation "Sex" ;
+    schema:domainIncludes ceds:C200275 ; schema:rangeIncludes ceds:C000255 .
+ceds:P600035 a rdf:Property ; rdfs:label "has Person Name" ; skos:notation "hasPersonName" ;
+    schema:domainIncludes ceds:C200275 ; schema:rangeIncludes ceds:C200377 .
+ceds:P000033 a rdf:Property ; rdfs:label "Birthdate" ; skos:notation "Birthdate" ;
+    schema:domainIncludes ceds:C200275 ; schema:rangeIncludes xsd:date .
+"""
+
+PROPERTY_SHAPES = """
+@prefix ceds: <http://ceds.ed.gov/terms#> .
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+ceds:FirstNameShape a sh:PropertyShape ; sh:path ceds:P000115 ; sh:name "First Name" ; sh:datatype xsd:string ; sh:maxLength 35 .
+ceds:LastOrSurnameShape a sh:PropertyShape ; sh:path ceds:P000172 ; sh:name "Last Name" ; sh:datatype xsd:string ; sh:maxLength 35 .
+ceds:SexShape a sh:PropertyShape ; sh:path ceds:P000255 ; sh:name "Sex" ; sh:nodeKind sh:IRI .
+ceds:BirthdateShape a sh:PropertyShape ; sh:path ceds:P000033 ; sh:name "Birthdate" ; sh:datatype xsd:date .
+"""
+
+
+@pytest.fixture
+def ontology():
+    return Graph().parse(data=ONTOLOGY, format="turtle")
+
+
+@pytest.fixture
+def property_graph():
+    return Graph().parse(data=PROPERTY_SHAPES, format="turtle")
+
+
+@pytest.fixture
+def selection():
+    """Every property of the fixture ontology, selected on its domain class."""
+    return {
+        CEDS.C200377: {CEDS.P000115, CEDS.P000172},
+        CEDS.C200275: {CEDS.P000255, CEDS.P600035, CEDS.P000033},
+    }
+
+
+@pytest.fixture(autouse=True)
+def ceds_namespace(monkeypatch):
+    """Bind the ceds prefix the way loading the ontology would."""
+    monkeypatch.setitem(SHACL.namespaces, "ceds", CEDS)
@@ -0,0 +1,127 @@
+import json
+
+import pytest
+from rdflib import URIRef
+
+from utils.project import (
+    PROJECT_FORMAT,
+    PROJECT_VERSION,
+    ProjectFileError,
+    dumps_project,
+    load_project_file,
+    loads_project,
+)
+
+CEDS = "http://ceds.ed.gov/terms#"
+XSD_STRING = "http://www.w3.org/2001/XMLSchema#string"
+
+
+def constraint(class_uri, prop_uri, value, shape=None, datatype=None):
+    return {
+        "value": value,
+        "enabled": True,
+        "shape": shape,
+        "class": class_uri,
+        "property": prop_uri,
+        "datatype": datatype,
+    }
+
+
+@pytest.fixture
+def state():
+    person, name = URIRef(f"{CEDS}C200275"), URIRef(f"{CEDS}C200377")
+    sex, birthdate, first_name = URIRef(f"{CEDS}P000255"), URIRef(f"{CEDS}P000033"), URIRef(f"{CEDS}P000115")
+    class_property_map = {person: {sex, birthdate}, name: {first_name}}
+    property_constraints = {
+        f"{name}::{first_name}": {
+            "maxLength": constraint(str(name), str(first_name), 60, f"{CEDS}FirstNameShape", XSD_STRING),
+            "pattern": constraint(str(name), str(first_name), '^[A-Z]"\\n', f"{CEDS}FirstNameShape", XSD_STRING),
+        },
+        f"{person}::{sex}": {
+            "minCount": constraint(str(person), str(sex), 1, f"{CEDS}SexShape"),
+        },
+    }
+    rules = [
+        {"datatype": "xsd:string", "constraint": "maxLength", "value": "60"},
+        {"notation": "^Last", "constraint": "maxLength", "value": 50, "override": True},
+    ]
+    return class_property_map, property_constraints, rules
+
+
+def test_round_trip(state):
+    assert loads_project(dumps_project(*state)) == state
+
+
+def test_round_trip_from_file(state, tmp_path):
+    path = tmp_path / "project.json"
+    path.write_bytes(dumps_project(*state))
+    assert load_project_file(path) == state
+
+
+def test_disabled_constraints_and_empty_selections_are_dropped(state):
+    class_property_map, property_constraints, rules = state
+    class_property_map[URIRef(f"{CEDS}C200000")] = set()
+    key = next(iter(property_constraints))
+    property_constraints[key]["maxLength"]["enabled"] = False
+
+    loaded_map, loaded_constraints, _ = loads_project(dumps_project(class_property_map, property_constraints, rules))
+    assert URIRef(f"{CEDS}C200000") not in loaded_map
+    assert "maxLength" not in loaded_constraints[key]
+    assert "pattern" in loaded_constraints[key]
+
+
+def test_uris_are_stored_once(state):
+    project = json.loads(dumps_project(*state))
+    assert project["format"] == PROJECT_FORMAT
+    assert project["version"] == PROJECT_VERSION
+    assert len(project["uris"]) == len(set(project["uris"]))
+
+
+def test_version_1_migrates_without_rules(state):
+    class_property_map, property_constraints, _ = state
+    project = json.loads(dumps_project(class_property_map, property_constraints))
+    project["version"] = 1
+    del project["rules"]
+
+    assert loads_project(json.dumps(project)) == (class_property_map, property_constraints, [])
+
+
+@pytest.mark.parametrize("data", [
+    "not json",
+    "[]",
+    "1",
+    json.dumps({"format": "something-else", "version": PROJECT_VERSION}),
+    json.dumps({"format": PROJECT_FORMAT, "version": 99}),
+])
+def test_rejects_other_files(data):
+    with pytest.raises(ProjectFileError):
+        loads_project(data)
+
+
+@pytest.mark.parametrize("change", [
+    {"selections": [[5, [0]]]},
+    {"selections": [[-1, [0]]]},
+    {"selections": [[0, [-2]]]},
+    {"selections": [[0, ["0"]]]},
+    {"selections": [[0, [True]]]},
+    {"selections": [[0]]},
+    {"constraints": [[0, 0, -3, -1, {}]]},
+    {"constraints": [[0, 0, -1, -1, []]]},
+])
+def test_rejects_malformed_projects(change):
+    project = {"format": PROJECT_FORMAT, "version": PROJECT_VERSION, "uris": [f"{CEDS}C200275"], **change}
+    with pytest.raises(ProjectFileError):
+        loads_project(json.dumps(project))
+
+
+def test_optional_uris_may_be_missing():
+    project = {
+        "format": PROJECT_FORMAT,
+        "version": PROJECT_VERSION,
+        "uris": [f"{CEDS}C200275", f"{CEDS}P000255"],
+        "selections": [[0, [1]]],
+        "constraints": [[0, 1, -1, -1, {"minCount": 1}]],
+    }
+    _, property_constraints, _ = loads_project(json.dumps(project))
+    entry = property_constraints[f"{CEDS}C200275::{CEDS}P000255"]["minCount"]
+    assert entry["shape"] is None and entry["datatype"] is None
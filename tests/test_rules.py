@@ -0,0 +1,165 @@
+import random
+import re
+
+import pytest
+from rdflib import URIRef
+from rdflib.namespace import SH, SKOS
+
+from utils.rules import RuleError, coerce_rule_value, compile_rules, evaluate_rules, merge_constraints
+from utils.SHACL import build_shapes, resolve_constraints
+
+from tests.conftest import CEDS
+
+NAMESPACES = {"ceds": CEDS}
+
+
+def expand(value):
+    value = str(value)
+    if value.startswith("xsd:"):
+        return f"http://www.w3.org/2001/XMLSchema#{value[4:]}"
+    if value.startswith("ceds:"):
+        return f"{CEDS}{value[5:]}"
+    return value
+
+
+def rule_matches(rule, datatype, prop_uri, class_uri, notation):
+    """Check one rule against one property, the way rules were applied one at a time."""
+    if rule.get("datatype") and expand(rule["datatype"]) != datatype:
+        return False
+    if rule.get("namespace"):
+        namespace = rule["namespace"]
+        namespace = str(NAMESPACES[namespace]) if namespace in NAMESPACES else expand(namespace)
+        if not prop_uri.startswith(namespace) or "#" in prop_uri[len(namespace):]:
+            return False
+    if rule.get("class") and expand(rule["class"]) != class_uri:
+        return False
+    if rule.get("notation") and (notation is None or not re.search(rule["notation"], notation)):
+        return False
+    return True
+
+
+def reference_rules(rules, g, class_property_map, property_graph):
+    """Apply every rule to every selected property in order; the first rule to set a constraint wins."""
+    resolved = {}
+    for class_uri, property_uris in class_property_map.items():
+        for prop_uri in property_uris:
+            shape = next(property_graph.subjects(SH.path, URIRef(prop_uri)), None)
+            if shape is None:
+                continue
+            datatype = property_graph.value(shape, SH.datatype)
+            datatype = str(datatype) if datatype is not None else None
+            notation = g.value(URIRef(prop_uri), SKOS.notation)
+            notation = str(notation) if notation is not None else None
+            entry = {}
+            for number, rule in enumerate(rules, start=1):
+                constraint = rule["constraint"]
+                if constraint in entry or not rule_matches(rule, datatype, str(prop_uri), str(class_uri), notation):
+                    continue
+                if not rule.get("override") and property_graph.value(shape, SH[constraint]) is not None:
+                    continue
+                entry[constraint] = (coerce_rule_value(constraint, rule["value"]), number)
+            if entry:
+                resolved[f"{class_uri}::{prop_uri}"] = entry
+    return resolved
+
+
+def evaluated(rules, g, class_property_map, property_graph):
+    resolved = evaluate_rules(compile_rules(rules, NAMESPACES), g, class_property_map, property_graph)
+    return {
+        key: {name: (data["value"], data["rule"]) for name, data in entry.items()}
+        for key, entry in resolved.items()
+    }
+
+
+RULES = [
+    {"datatype": "xsd:string", "constraint": "maxLength", "value": "60"},
+    {"datatype": "xsd:string", "constraint": "minLength", "value": "1"},
+    {"notation": "^Last", "constraint": "maxLength", "value": "50", "override": True},
+    {"namespace": "ceds", "datatype": "xsd:date", "constraint": "minCount", "value": 1},
+    {"class": "ceds:C200377", "constraint": "pattern", "value": "^\\S"},
+    {"constraint": "minCount", "value": "0"},
+]
+
+
+def test_matches_reference(ontology, property_graph, selection):
+    expected = reference_rules(RULES, ontology, selection, property_graph)
+    assert evaluated(RULES, ontology, selection, property_graph) == expected
+    assert expected[f"{CEDS.C200377}::{CEDS.P000115}"] == {"minLength": (1, 2), "pattern": ("^\\S", 5), "minCount": (0, 6)}
+    assert expected[f"{CEDS.C200377}::{CEDS.P000172}"]["maxLength"] == (50, 3)
+    assert expected[f"{CEDS.C200275}::{CEDS.P000033}"]["minCount"] == (1, 4)
+
+
+def test_matches_reference_for_random_rules(ontology, property_graph, selection):
+    choices = {
+        "datatype": [None, "xsd:string", "xsd:date", "xsd:integer"],
+        "namespace": [None, "ceds", str(CEDS), "http://example.org/"],
+        "class": [None, "ceds:C200377", "ceds:C200275", str(CEDS.C200000)],
+        "notation": [None, "^Last", "Name$", "^(Sex|Birthdate)$", "x"],
+        "constraint": ["minCount", "maxCount", "maxLength", "pattern"],
+        "override": [False, True],
+    }
+    generator = random.Random(2024)
+    for _ in range(200):
+        rules = []
+        for _ in range(generator.randint(1, 12)):
+            rule = {field: generator.choice(options) for field, options in choices.items()}
+            rule["value"] = str(generator.randint(0, 99))
+            rules.append({field: value for field, value in rule.items() if value is not None})
+        assert evaluated(rules, ontology, selection, property_graph) == reference_rules(
+            rules, ontology, selection, property_graph
+        ), rules
+
+
+def test_base_values_need_override(ontology, property_graph, selection):
+    rules = [{"datatype": "xsd:string", "constraint": "maxLength", "value": "60"}]
+    assert evaluated(rules, ontology, selection, property_graph) == {}
+
+    rules[0]["override"] = True
+    resolved = evaluated(rules, ontology, selection, property_graph)
+    assert resolved[f"{CEDS.C200377}::{CEDS.P000115}"] == {"maxLength": (60, 1)}
+
+
+def test_properties_without_shapes_are_skipped(ontology, property_graph, selection):
+    rules = [{"constraint": "minCount", "value": "1"}]
+    resolved = evaluated(rules, ontology, selection, property_graph)
+    assert f"{CEDS.C200275}::{CEDS.P600035}" not in resolved
+    assert len(resolved) == 4
+
+
+def test_property_edits_take_precedence(ontology, property_graph, selection):
+    key = f"{CEDS.C200377}::{CEDS.P000115}"
+    edit = {"value": 20, "enabled": True, "shape": str(CEDS.FirstNameShape),
+            "class": str(CEDS.C200377), "property": str(CEDS.P000115), "datatype": None}
+    rules = [{"datatype": "xsd:string", "constraint": "maxLength", "value": "60", "override": True}]
+
+    resolved = resolve_constraints(ontology, selection, {key: {"maxLength": edit}}, property_graph, rules)
+    assert resolved[key]["maxLength"]["value"] == 20
+    assert resolved[f"{CEDS.C200377}::{CEDS.P000172}"]["maxLength"]["value"] == 60
+
+    # An edit that only repeats the property file value does not mask the rule
+    resolved = resolve_constraints(ontology, selection, {key: {"maxLength": dict(edit, value=35)}}, property_graph, rules)
+    assert resolved[key]["maxLength"]["value"] == 60
+
+    shapes = build_shapes(ontology, selection, {key: {"maxLength": edit}}, property_graph, rules=rules)
+    assert shapes.property_shapes[str(CEDS.FirstNameShape)].values[str(SH.maxLength)][0].value == 20
+
+
+def test_merge_keeps_rule_entries():
+    rule_constraints = {"a::b": {"minCount": {"value": 1}, "maxCount": {"value": 2}}}
+    merged = merge_constraints(rule_constraints, {"a::b": {"maxCount": {"value": 3}}, "c::d": {"minCount": {"value": 0}}})
+    assert merged == {
+        "a::b": {"minCount": {"value": 1}, "maxCount": {"value": 3}},
+        "c::d": {"minCount": {"value": 0}},
+    }
+    assert rule_constraints["a::b"]["maxCount"] == {"value": 2}
+
+
+@pytest.mark.parametrize("rule", [
+    {"constraint": "unknown", "value": "1"},
+    {"constraint": "minCount"},
+    {"constraint": "minCount", "value": "many"},
+    {"constraint": "pattern", "value": "x", "notation": "("},
+])
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises(RuleError):
+        compile_rules([rule], NAMESPACES)
@@ -0,0 +1,79 @@
+from rdflib import Graph
+from rdflib.compare import isomorphic
+from rdflib.namespace import SH, XSD
+
+from utils.SHACL import build_shapes
+from utils.shapes import Literal, ShapeModel
+
+EX = "http://example.org/"
+
+
+def parse_turtle(data):
+    return Graph().parse(data=data, format="turtle")
+
+
+def assert_writer_matches_rdflib(shapes):
+    written = parse_turtle(shapes.to_turtle())
+    serialized = parse_turtle(shapes.to_graph().serialize(format="turtle"))
+    assert isomorphic(written, serialized)
+    assert len(written) == len(serialized)
+
+
+def test_literals_match_rdflib():
+    shapes = ShapeModel({"ex": EX})
+    shape = shapes.property_shape(f"{EX}ValueShape")
+    shape.declare(f"{EX}value")
+    for value in (
+        Literal('say "hi" \\ back'),
+        Literal("line one\nline two\r\n\tindented"),
+        Literal('"""'),
+        Literal("Ünïcødé ✓"),
+        Literal(""),
+        Literal.of(True),
+        Literal.of(False),
+        Literal.of(42),
+        Literal.of(-7),
+        Literal.of(0.25),
+        Literal("2001-02-03", XSD.date),
+        Literal("1.50", XSD.decimal),
+        Literal("x", f"{EX}Type"),
+    ):
+        shape.add(SH.hasValue, value)
+    assert_writer_matches_rdflib(shapes)
+
+
+def test_uris_and_lists_match_rdflib():
+    nested = f"{EX}nested/"
+    shapes = ShapeModel({"ex": EX, "nested": nested})
+    node = shapes.node_shape(f"{EX}ThingShape")
+    node.add_target_class(f"{nested}Thing")
+    node.closed = True
+    node.ignored_properties = (f"{EX}a", f"{EX}b.c", f"{EX}-leading", "urn:other:thing")
+    for shape_uri in (f"{EX}path/with/slashes", f"{EX}odd%20name", "http://unbound.example/Shape"):
+        node.add_property(shape_uri)
+        shapes.property_shape(shape_uri).declare(f"{nested}prop")
+    shapes.property_shape(f"{EX}odd%20name").add(SH["in"], (f"{EX}One", Literal("two"), Literal.of(3)))
+    assert_writer_matches_rdflib(shapes)
+
+
+def test_empty_shapes_are_left_out():
+    shapes = ShapeModel()
+    shapes.property_shape(f"{EX}Unused")
+    assert len(shapes) == 0
+    assert len(parse_turtle(shapes.to_turtle())) == 0
+
+
+def test_generated_shapes_match_rdflib(ontology, property_graph, selection):
+    property_constraints = {
+        f"{uri}::{prop}": {
+            "pattern": {"value": '^[A-Z]"\\s', "enabled": True, "shape": None,
+                        "class": str(uri), "property": str(prop), "datatype": None}
+        }
+        for uri, properties in selection.items()
+        for prop in properties
+    }
+    rules = [{"datatype": "xsd:string", "constraint": "maxLength", "value": "60", "override": True}]
+    shapes = build_shapes(ontology, selection, property_constraints, property_graph, rules=rules)
+
+    assert len(shapes) > len(selection)
+    assert_writer_matches_rdflib(shapes)
@@ -0,0 +1,131 @@
+from rdflib import BNode, Dataset, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, RDFS, XSD
+
+from utils.sqlite_store import SQLiteStore, STAGING_GRAPH_PREFIX
+
+EX = "http://example.org/"
+SOURCE = URIRef("urn:ceds-shacl-generator:source:0001")
+
+
+def open_store(path):
+    store = SQLiteStore()
+    store.open(str(path), create=True)
+    return Dataset(store=store, default_union=True)
+
+
+def sample_triples():
+    subject = URIRef(f"{EX}s")
+    return [
+        (subject, RDF.type, RDFS.Class),
+        (subject, RDFS.label, Literal("plain")),
+        (subject, RDFS.label, Literal('say "hello"\\ back')),
+        (subject, RDFS.comment, Literal("first line\nsecond line\r\n\tthird line")),
+        (subject, RDFS.comment, Literal('"""triple quoted"""')),
+        (subject, RDFS.label, Literal("Nom", lang="fr")),
+        (subject, RDFS.label, Literal("Name", lang="en-US")),
+        (subject, URIRef(f"{EX}count"), Literal(42)),
+        (subject, URIRef(f"{EX}ratio"), Literal("0.5", datatype=XSD.decimal)),
+        (subject, URIRef(f"{EX}born"), Literal("2001-02-03", datatype=XSD.date)),
+        (subject, URIRef(f"{EX}custom"), Literal("x y", datatype=URIRef(f"{EX}Type"))),
+        (subject, URIRef(f"{EX}unicode"), Literal("Ünïcødé ✓")),
+        (subject, URIRef(f"{EX}node"), BNode("b0")),
+        (URIRef(f"{EX}path/with%20escape#frag"), RDFS.seeAlso, subject),
+    ]
+
+
+def test_terms_round_trip(tmp_path):
+    graph = open_store(tmp_path / "store.db")
+    source = graph.graph(SOURCE)
+    triples = sample_triples()
+    for triple in triples:
+        source.add(triple)
+    graph.store.commit()
+    graph.store.close()
+
+    reopened = open_store(tmp_path / "store.db")
+    stored = set(reopened.graph(SOURCE))
+    assert stored == set(triples)
+    for triple in triples:
+        assert triple in reopened
+        assert reopened.value(triple[0], triple[1]) is not None
+
+
+def test_literal_forms_are_distinct(tmp_path):
+    graph = open_store(tmp_path / "store.db").graph(SOURCE)
+    subject = URIRef(f"{EX}s")
+    values = [Literal("1"), Literal(1), Literal("1", lang="en"), Literal("1", datatype=XSD.string)]
+    for value in values:
+        graph.add((subject, RDF.value, value))
+
+    assert len(graph) == len(values)
+    for value in values:
+        assert list(graph.objects(subject, RDF.value)).count(value) == 1
+        assert list(graph.subjects(RDF.value, value)) == [subject]
+
+
+def test_parsed_graph_is_isomorphic(tmp_path):
+    data = Graph().parse(format="turtle", data='''
+        @prefix ex: <http://example.org/> .
+        @prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+        ex:a ex:text """multi
+        line with "quotes" and \\\\ backslash""" ;
+            ex:list ( ex:b "two"@en 3 ) ;
+            ex:nested [ ex:value "4.0"^^xsd:decimal ] .
+    ''')
+    graph = open_store(tmp_path / "store.db")
+    source = graph.graph(SOURCE)
+    for triple in data:
+        source.add(triple)
+
+    assert isomorphic(source, data)
+    assert len(graph) == len(data)
+
+
+def test_union_merges_named_graphs(tmp_path):
+    graph = open_store(tmp_path / "store.db")
+    triple = (URIRef(f"{EX}s"), RDFS.label, Literal("shared"))
+    graph.graph(SOURCE).add(triple)
+    graph.graph(URIRef("urn:ceds-shacl-generator:source:0002")).add(triple)
+
+    assert len(graph) == 1
+    assert list(graph.triples((None, None, None))) == [triple]
+    assert set(graph.store.contexts(triple)) == {SOURCE, URIRef("urn:ceds-shacl-generator:source:0002")}
+
+
+def test_staging_graphs_are_hidden_from_union(tmp_path):
+    graph = open_store(tmp_path / "store.db")
+    staging = URIRef(f"{STAGING_GRAPH_PREFIX}1:key:source")
+    visible = (URIRef(f"{EX}s"), RDFS.label, Literal("visible"))
+    staged = (URIRef(f"{EX}s"), RDFS.label, Literal("staged"))
+    graph.graph(SOURCE).add(visible)
+    graph.graph(staging).add(staged)
+
+    assert set(graph.triples((None, None, None))) == {visible}
+    assert len(graph) == 1
+    assert set(graph.graph(staging)) == {staged}
+
+    graph.store.replace_context(staging, SOURCE)
+    assert set(graph.triples((None, None, None))) == {staged}
+    assert set(graph.graph(staging)) == set()
+
+
+def test_remove_staging_graphs_keeps_requested(tmp_path):
+    graph = open_store(tmp_path / "store.db")
+    keep = URIRef(f"{STAGING_GRAPH_PREFIX}1:keep:source")
+    drop = URIRef(f"{STAGING_GRAPH_PREFIX}1:drop:source")
+    for identifier in (keep, drop):
+        graph.graph(identifier).add((URIRef(f"{EX}s"), RDFS.label, Literal(str(identifier))))
+
+    assert graph.store.remove_staging_graphs(keep=[keep]) == 1
+    assert len(graph.graph(keep)) == 1
+    assert len(graph.graph(drop)) == 0
+
+
+def test_namespaces_persist(tmp_path):
+    graph = open_store(tmp_path / "store.db")
+    graph.bind("ex", EX)
+    graph.store.close()
+
+    reopened = open_store(tmp_path / "store.db")
+    assert dict(reopened.namespaces())["ex"] == URIRef(EX)
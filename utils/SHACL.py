@@ -1,19 +1,51 @@
-from rdflib import Graph, URIRef, Literal, Namespace, BNode
-from rdflib.namespace import RDF, RDFS, SH, XSD, SDO, SKOS
+from rdflib import Graph, Dataset, URIRef, Namespace, BNode
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.namespace import RDF, RDFS, SH, XSD, SDO
+from rdflib.util import guess_format
 from rdflib.collection import Collection
+from rdflib.parser import InputSource
 import logging
 import csv
 from pathlib import Path
 from io import BytesIO
 from utils.common import add_namespace, get_rdf_format, get_label, get_properties_for_class
+from utils.sqlite_store import SQLiteStore, STAGING_GRAPH_PREFIX
+from utils.project import dumps_project, loads_project, ProjectFileError
+from utils.loading import submit_load_job, running_job_keys, LoadCancelled, ProgressReader
+from utils.shapes import ShapeModel, Literal as ShapeLiteral, iri
+from utils.index import OntologyIndex
+from utils.artifacts import ArtifactStore, ARTIFACT_FILES, COMPRESSION_SUFFIXES, DEFAULT_ARTIFACT_DIR, artifact_key, available_compressions
+from utils.rules import RULE_FIELDS, RULE_CONSTRAINTS, RuleError, compile_rules, evaluate_rules, merge_constraints
 import streamlit as st
 import json
+import os
+import time
+import hashlib
+import threading
+import pandas as pd
+from functools import partial
 from streamlit_ace import st_ace
 
 logger = logging.getLogger(__name__)
 
 namespaces = {}
 
+IGNORED_PROPERTIES = tuple(iri(p) for p in (RDF.type, URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#id"), RDF.value, RDFS.label))
+
+DEFAULT_STORE_PATH = "ontology_store.sqlite"
+# Each ontology file is kept in its own named graph, identified by a hash of its content
+SOURCE_GRAPH_PREFIX = "urn:ceds-shacl-generator:source:"
+_apply_lock = threading.Lock()
+
+# Artifacts offered for download on the SHACL page: (artifact, button label, MIME type)
+ARTIFACT_DOWNLOADS = (
+    ("shacl", "Download SHACL (Turtle)", "text/turtle"),
+    ("ntriples", "Download SHACL (N-Triples)", "application/n-triples"),
+    ("context", "Download JSON-LD Context", "application/ld+json"),
+    ("bundle", "Download Validation Bundle", "text/turtle"),
+)
+COMPRESSED_MIME_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+
 def get_namespace(prefix, namespaces):
     return namespaces.get(prefix, Namespace(f"http://unknown.org/{prefix}#"))
 
@@ -28,7 +60,7 @@ def get_filter_class_ids_from_file(file_obj):
         else:
             # Assume it's a file path
             with open(file_obj, "r", newline="") as f:
-                reader = csv.reader(f)
+                reader = csv.reader(f.read().splitlines())
 
         for row in reader:
             if len(row) == 2:
@@ -49,10 +81,14 @@ def get_filter_class_ids_from_file(file_obj):
         return {}
 
 def serialize_graph(g, g1, output_file="Filtered_SHACL.ttl"):
-    """Serialize the SHACL graph to a file."""
+    """Serialize the SHACL graph (an rdflib Graph or ShapeModel) to a file."""
     output_path = Path(output_file)
     try:
-        output_path.write_text(g1.serialize(format="turtle"))
+        content = g1.to_turtle() if isinstance(g1, ShapeModel) else g1.serialize(format="turtle")
+        # Write next to the target and rename so readers never see a partial file
+        temp_path = output_path.with_name(f".{output_path.name}.tmp")
+        temp_path.write_text(content)
+        os.replace(temp_path, output_path)
         logger.info(f"Serialized SHACL graph to {output_path}")
     except Exception as e:
         logger.exception(f"Failed to serialize SHACL graph: {e}")
@@ -64,69 +100,95 @@ def get_parent_classes(g, class_property_map):
             parent_classes[class_uri] = parent  
     return parent_classes
 
-def create_node_shape(g1, g, class_uri, parent_classes, shacl_namespace):
+def create_node_shape(shapes, index, class_uri, parent_classes, shacl_namespace, context_terms=None):
     """Create a SHACL node shape for a given class."""
-    notation = next(g.objects(URIRef(class_uri), SKOS.notation), None)
+    notation = index.notation(class_uri)
     if not notation:
         logger.warning(f"No skos:notation found for class URI: {class_uri}")
         return
 
+    if context_terms is not None:
+        add_context_term(context_terms, str(notation), class_uri)
+
     # Use the SHACL namespace to create the node shape URI
-    node_title = URIRef(f"{shacl_namespace}{notation}Shape")
-    g1.add((node_title, RDF.type, SH.NodeShape))
+    node_shape = shapes.node_shape(f"{shacl_namespace}{notation}Shape")
 
     # Ensure the targetClass uses the bound namespace
     class_namespace = namespaces.get(class_uri.split("#")[0], None)
     if class_namespace:
-        target_class = URIRef(f"{class_namespace}{class_uri.split('#')[-1]}")
-        g1.add((node_title, SH.targetClass, target_class))
+        node_shape.add_target_class(f"{class_namespace}{class_uri.split('#')[-1]}")
     else:
-        g1.add((node_title, SH.targetClass, URIRef(class_uri)))  # Fallback to full URI if namespace is not found
-
-    g1.add((node_title, SH.closed, Literal(True, datatype=XSD.boolean)))
-
-    ignored_props_list = [RDF.type, URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#id"), RDF.value, RDFS.label]
-    ignored_list_node = BNode()
-    Collection(g1, ignored_list_node, ignored_props_list)
-
-    g1.add((node_title, SH.ignoredProperties, ignored_list_node))
-
-def create_property_shapes(g1, g, class_uri, property_uris, class_property_map, shacl_namespace):
-    class_notation = next(g.objects(URIRef(class_uri), SKOS.notation), None)
+        node_shape.add_target_class(class_uri)  # Fallback to full URI if namespace is not found
+
+    node_shape.closed = True
+    node_shape.ignored_properties = IGNORED_PROPERTIES
+
+NODE_KINDS = {
+    "IRI": SH.IRI,
+    "BlankNode": SH.BlankNode,
+    "Literal": SH.Literal,
+    "BlankNodeOrIRI": SH.BlankNodeOrIRI,
+    "BlankNodeOrLiteral": SH.BlankNodeOrLiteral,
+    "IRIOrLiteral": SH.IRIOrLiteral
+}
+
+def is_custom_constraint(constraint_name, user_value, default_value):
+    """Return True if a constraint value differs from the property graph default (None when there is none)."""
+    if default_value is None:
+        return True
+    default_python_value = convert_rdf_literal_to_python(default_value)
+    try:
+        return _differs(constraint_name, user_value, default_value, default_python_value)
+    except (TypeError, ValueError):
+        return str(user_value) != str(default_python_value)
+
+def _differs(constraint_name, user_value, default_value, default_python_value):
+    if constraint_name in ["minCount", "maxCount", "minLength", "maxLength"]:
+        return int(user_value) != int(default_python_value)
+    if constraint_name in ["minInclusive", "maxInclusive", "minExclusive", "maxExclusive"]:
+        return float(user_value) != float(default_python_value)
+    if constraint_name == "uniqueLang":
+        return bool(user_value) != bool(default_python_value)
+    if constraint_name == "nodeKind":
+        return NODE_KINDS.get(str(user_value), SH.IRI) != default_value
+    return str(user_value) != str(default_python_value)
+
+def create_property_shapes(shapes, index, class_uri, property_uris, class_property_map, shacl_namespace, property_constraints, context_terms=None):
+    class_notation = index.notation(class_uri)
     if not class_notation:
         logger.warning(f"No skos:notation found for class URI: {class_uri}")
         return
 
-    class_node_title = URIRef(f"{shacl_namespace}{class_notation}Shape")
+    class_node_shape = shapes.node_shape(f"{shacl_namespace}{class_notation}Shape")
 
     for prop_uri in property_uris:
-        ranges = list(g.objects(URIRef(prop_uri), SDO.rangeIncludes))
-        prop_notation = next(g.objects(URIRef(prop_uri), SKOS.notation), None)
+        ranges = index.ranges_of(prop_uri)
+        prop_notation = index.notation(prop_uri)
 
         if not prop_notation:
             logger.warning(f"No skos:notation found for property URI: {prop_uri}")
             continue  
 
-        for prefix, uri in g.namespaces():
-            if str(prop_uri).startswith(str(uri)):
-                prop_namespace = uri
-                break
-        else:
-            prop_namespace = str(prop_uri).rsplit("#", 1)[0] + "#"
+        if context_terms is not None:
+            # Properties ranging over CEDS classes (including option sets) hold IRIs
+            add_context_term(context_terms, str(prop_notation), prop_uri,
+                             is_iri=any("#C" in str(range_uri) for range_uri in ranges))
+
+        prop_namespace = index.namespace_for(prop_uri)
 
-        prop_shape = URIRef(f"{prop_namespace}{prop_notation}Shape")
+        prop_shape_uri = f"{prop_namespace}{prop_notation}Shape"
 
         # Determine if there are any truly custom constraints (not just defaults from property graph)
         constraints_key = f"{class_uri}::{prop_uri}"
-        constraints = st.session_state.property_constraints.get(constraints_key, {})
+        constraints = property_constraints.get(constraints_key, {})
         
         # Check if constraints are truly custom by comparing with property graph defaults
         has_truly_custom_constraints = False
         custom_constraints_to_add = {}  # Store only the truly custom constraints
         
-        if constraints and st.session_state.property_graph:
+        if constraints and index.has_property_graph:
             # Find the shape in the property graph for this property
-            property_shapes = list(st.session_state.property_graph.subjects(predicate=SH.path, object=URIRef(prop_uri)))
+            property_shapes = index.shapes_for(prop_uri)
             
             for prop_graph_shape in property_shapes:
                 for constraint_name, constraint_data in constraints.items():
@@ -134,53 +196,8 @@ def create_property_shapes(g1, g, class_uri, property_uris, class_property_map,
                         shacl_predicate = getattr(SH, constraint_name, None)
                         if shacl_predicate:
                             # Get the default value from the property graph
-                            default_value = st.session_state.property_graph.value(prop_graph_shape, shacl_predicate)
-                            user_value = constraint_data["value"]
-                            
-                            is_custom = False
-                            
-                            # Convert both to comparable types
-                            if default_value is not None:
-                                default_python_value = convert_rdf_literal_to_python(default_value)
-                                
-                                # Compare values - if they're different, it's a custom constraint
-                                if constraint_name in ["minCount", "maxCount", "minLength", "maxLength"]:
-                                    if int(user_value) != int(default_python_value):
-                                        is_custom = True
-                                elif constraint_name in ["minInclusive", "maxInclusive", "minExclusive", "maxExclusive"]:
-                                    if float(user_value) != float(default_python_value):
-                                        is_custom = True
-                                elif constraint_name == "pattern":
-                                    if str(user_value) != str(default_python_value):
-                                        is_custom = True
-                                elif constraint_name == "uniqueLang":
-                                    if bool(user_value) != bool(default_python_value):
-                                        is_custom = True
-                                elif constraint_name == "nodeKind":
-                                    # Compare node kind values
-                                    node_kind_map = {
-                                        "IRI": SH.IRI,
-                                        "BlankNode": SH.BlankNode,
-                                        "Literal": SH.Literal,
-                                        "BlankNodeOrIRI": SH.BlankNodeOrIRI,
-                                        "BlankNodeOrLiteral": SH.BlankNodeOrLiteral,
-                                        "IRIOrLiteral": SH.IRIOrLiteral
-                                    }
-                                    user_node_kind = node_kind_map.get(str(user_value), SH.IRI)
-                                    if user_node_kind != default_value:
-                                        is_custom = True
-                                elif constraint_name == "languageIn":
-                                    # Compare language lists
-                                    if str(user_value) != str(default_python_value):
-                                        is_custom = True
-                                else:
-                                    if str(user_value) != str(default_python_value):
-                                        is_custom = True
-                            else:
-                                # No default value exists, so any user value is custom
-                                is_custom = True
-                            
-                            if is_custom:
+                            default_value = index.shape_value(prop_graph_shape, constraint_name)
+                            if is_custom_constraint(constraint_name, constraint_data["value"], default_value):
                                 has_truly_custom_constraints = True
                                 custom_constraints_to_add[constraint_name] = constraint_data
                 
@@ -193,12 +210,9 @@ def create_property_shapes(g1, g, class_uri, property_uris, class_property_map,
         should_include_property = False
         is_iri_node_kind = False
         
-        # Get all of the RDFS classes in the graph to check if the range is a CEDS base class and not an option set
-        classes = g.subjects(RDF.type, RDFS.Class)
-        
         for range_uri in ranges:
             is_ceds_class = "#C" in str(range_uri)
-            option_set = list(g.subjects(RDF.type, URIRef(range_uri)))
+            option_set = index.instances_of(range_uri)
 
             if is_ceds_class:
                 if option_set and any(not str(s).startswith("http://ceds.ed.gov/terms#") for s in option_set):
@@ -206,35 +220,28 @@ def create_property_shapes(g1, g, class_uri, property_uris, class_property_map,
                     if has_truly_custom_constraints:
                         should_include_property = True
                         # Override property shape with sh:in
-                        option_set_node = BNode()
-                        Collection(g1, option_set_node, option_set)
-                        g1.add((prop_shape, SH["in"], option_set_node))
-                elif range_uri in classes:
+                        shapes.property_shape(prop_shape_uri).add(SH["in"], tuple(iri(individual) for individual in option_set))
+                elif index.is_class(range_uri):
                     # This points to another class - always include (IRI node kind)
                     should_include_property = True
                     is_iri_node_kind = True
-                    g1.add((prop_shape, RDF.type, SH.PropertyShape))
-                    g1.add((prop_shape, SH.path, URIRef(prop_uri)))
+                    prop_shape = shapes.property_shape(prop_shape_uri)
+                    prop_shape.declare(prop_uri)
 
-                    range_notation = next(g.objects(range_uri, SKOS.notation), None)
+                    range_notation = index.notation(range_uri)
                     if not range_notation:
                         logger.warning(f"No skos:notation found for range URI: {range_uri}")
                         continue
 
-                    for prefix, uri in g.namespaces():
-                        if str(range_uri).startswith(str(uri)):
-                            range_namespace = uri
-                            break
-                    else:
-                        range_namespace = str(range_uri).rsplit("#", 1)[0] + "#"
+                    range_namespace = index.namespace_for(range_uri)
 
-                    range_shape = URIRef(f"{range_namespace}{range_notation}Shape")
+                    range_shape = f"{range_namespace}{range_notation}Shape"
 
-                    g1.add((prop_shape, SH["class"], URIRef(range_uri)))
-                    g1.add((prop_shape, SH["node"], range_shape))
+                    prop_shape.add(SH["class"], iri(range_uri))
+                    prop_shape.add(SH["node"], iri(range_shape))
 
                     if str(range_uri) not in class_property_map:
-                        g1.add((prop_shape, SH.nodeKind, SH.IRI))
+                        prop_shape.add(SH.nodeKind, iri(SH.IRI))
             else:
                 # Not a CEDS class - include only if has truly custom constraints
                 if has_truly_custom_constraints:
@@ -242,12 +249,12 @@ def create_property_shapes(g1, g, class_uri, property_uris, class_property_map,
 
         # Only add the property to the class node shape if it meets inclusion criteria
         if should_include_property:
-            g1.add((class_node_title, SH.property, prop_shape))
+            class_node_shape.add_property(prop_shape_uri)
             
             # Add basic property shape properties if not already added
-            if not list(g1.predicate_objects(subject=prop_shape)):
-                g1.add((prop_shape, RDF.type, SH.PropertyShape))
-                g1.add((prop_shape, SH.path, URIRef(prop_uri)))
+            if not shapes.has_property_shape(prop_shape_uri):
+                shapes.property_shape(prop_shape_uri).declare(prop_uri)
+            prop_shape = shapes.property_shape(prop_shape_uri)
 
             # Add only truly custom constraints (those that differ from defaults)
             for constraint_name, constraint_data in custom_constraints_to_add.items():
@@ -257,43 +264,33 @@ def create_property_shapes(g1, g, class_uri, property_uris, class_property_map,
                     
                     # Handle different data types appropriately
                     if constraint_name in ["minCount", "maxCount", "minLength", "maxLength"]:
-                        literal_value = Literal(int(value))
+                        literal_value = ShapeLiteral.of(int(value))
                     elif constraint_name in ["minInclusive", "maxInclusive", "minExclusive", "maxExclusive"]:
                         # Determine appropriate datatype based on the property's datatype
                         datatype = constraint_data.get("datatype")
                         if datatype and str(datatype) in [str(XSD.integer), str(XSD.int), str(XSD.long)]:
-                            literal_value = Literal(int(value))
+                            literal_value = ShapeLiteral.of(int(value))
                         else:
-                            literal_value = Literal(float(value))
+                            literal_value = ShapeLiteral.of(float(value))
                     elif constraint_name == "pattern":
-                        literal_value = Literal(str(value))
+                        literal_value = ShapeLiteral.of(str(value))
                     elif constraint_name == "uniqueLang":
-                        literal_value = Literal(bool(value), datatype=XSD.boolean)
+                        literal_value = ShapeLiteral.of(bool(value))
                     elif constraint_name == "nodeKind":
                         # Handle nodeKind as a resource, not a literal
-                        node_kind_map = {
-                            "IRI": SH.IRI,
-                            "BlankNode": SH.BlankNode,
-                            "Literal": SH.Literal,
-                            "BlankNodeOrIRI": SH.BlankNodeOrIRI,
-                            "BlankNodeOrLiteral": SH.BlankNodeOrLiteral,
-                            "IRIOrLiteral": SH.IRIOrLiteral
-                        }
-                        literal_value = node_kind_map.get(str(value), SH.IRI)
-                        g1.add((prop_shape, shacl_predicate, literal_value))
+                        literal_value = NODE_KINDS.get(str(value), SH.IRI)
+                        prop_shape.add(shacl_predicate, iri(literal_value))
                         continue
                     elif constraint_name == "languageIn":
                         # Handle languageIn as a list
                         languages = [lang.strip() for lang in str(value).split(",") if lang.strip()]
                         if languages:
-                            lang_list_node = BNode()
-                            Collection(g1, lang_list_node, [Literal(lang) for lang in languages])
-                            g1.add((prop_shape, shacl_predicate, lang_list_node))
+                            prop_shape.add(shacl_predicate, tuple(ShapeLiteral.of(lang) for lang in languages))
                         continue
                     else:
-                        literal_value = Literal(str(value))
+                        literal_value = ShapeLiteral.of(str(value))
                     
-                    g1.add((prop_shape, shacl_predicate, literal_value))
+                    prop_shape.add(shacl_predicate, literal_value)
 
 def initialize_graphs(ceds_path, extension_path):
     """Initialize RDF graphs for CEDS Ontology and Extension Ontology."""
@@ -302,11 +299,11 @@ def initialize_graphs(ceds_path, extension_path):
     try:
         # Parse the CEDS Ontology file
         logger.info(f"Parsing CEDS Ontology file: {ceds_path}")
-        g.parse(ceds_path, format=rdflib.util.guess_format(ceds_path))
+        g.parse(ceds_path, format=guess_format(ceds_path))
         if extension_path:
             # Parse the Extension Ontology file
             logger.info(f"Parsing Extension Ontology file: {extension_path}")
-            g.parse(extension_path, format=rdflib.util.guess_format(extension_path))
+            g.parse(extension_path, format=guess_format(extension_path))
     except Exception as e:
         logger.exception(f"Failed to parse RDF files: {e}")
         raise
@@ -369,9 +366,42 @@ def ontology_manager():
 
     logging.warning(st.session_state.file_list)
 
+    use_store = st.checkbox(
+        "Keep combined graph in an on-disk store",
+        value=bool(st.session_state.get("store_path")),
+        help="Back the combined graph with an embedded SQLite store that is shared across sessions and restarts."
+    )
+    if use_store:
+        st.session_state.store_path = st.text_input(
+            "Store path",
+            value=st.session_state.get("store_path") or DEFAULT_STORE_PATH
+        )
+    else:
+        st.session_state.store_path = None
+
     # Button to load ontologies using the stored file list
     if st.button("Load Ontologies"):
-        st.session_state.combined_graph = load_ontologies(st.session_state.file_list)
+        if st.session_state.store_path:
+            combined_graph = open_persistent_graph(st.session_state.store_path)
+        elif isinstance(st.session_state.combined_graph, Dataset) and not isinstance(st.session_state.combined_graph.store, SQLiteStore):
+            combined_graph = st.session_state.combined_graph
+        else:
+            combined_graph = Dataset(default_union=True)
+        st.session_state.load_messages = []
+        previous_job = st.session_state.get("load_job")
+        st.session_state.load_job = submit_load_job(
+            st.session_state.file_list,
+            partial(load_ontologies, combined_graph=combined_graph),
+            # The on-disk graph is shared by every session using the same store path
+            st.session_state.store_path or id(combined_graph)
+        )
+        # Stop waiting for a superseded load; subscribing first keeps a job both loads share running
+        if previous_job is not None:
+            previous_job.cancel()
+
+    show_load_progress()
+    for level, message in st.session_state.get("load_messages", []):
+        getattr(st, level)(message)
 
     st.subheader("Upload Property File")
 
@@ -406,38 +436,304 @@ def ontology_manager():
             g = Graph()
             g.parse(data=file_content, format=fmt)
             st.session_state.property_graph = g
+            # Key the artifact store on the file content instead of hashing the parsed graph
+            g.content_digest = hashlib.sha256(file_content).hexdigest()
 
             st.success(f"SHACL file '{uploaded.name}' loaded and parsed successfully.")
         except Exception as e:
             st.error(f"Failed to parse SHACL file: {e}")
 
+    project_manager()
+
+def project_manager():
+    """Save and restore the class-property selections and constraint values."""
+    st.subheader("Project File")
+
+    st.download_button(
+        "Save Project",
+        data=dumps_project(
+            st.session_state.class_property_map,
+            st.session_state.property_constraints,
+            st.session_state.get("constraint_rules")
+        ),
+        file_name="shacl_project.json",
+        mime="application/json",
+        disabled=not st.session_state.class_property_map
+    )
 
-def load_ontologies(file_list):
-    """Load all files from session_state into a combined RDF graph."""
-    combined_graph = Graph()
+    uploaded_project = st.file_uploader("Load Project", type=["json"], accept_multiple_files=False)
 
-    for file, namespace_url, namespace_shortname in file_list:
+    # Only apply an uploaded project once so later edits are not overwritten on rerun
+    if uploaded_project is not None and uploaded_project.file_id != st.session_state.get("project_file_id"):
+        try:
+            class_property_map, property_constraints, rules = loads_project(uploaded_project.getvalue())
+            st.session_state.class_property_map = class_property_map
+            st.session_state.property_constraints = property_constraints
+            st.session_state.constraint_rules = rules
+            # Reset the rules editor so it shows the loaded rules
+            st.session_state.constraint_rules_editor_data = list(rules)
+            st.session_state.pop("constraint_rules_editor", None)
+            st.session_state.project_file_id = uploaded_project.file_id
+            st.success(
+                f"Project '{uploaded_project.name}' loaded: {len(class_property_map)} classes, "
+                f"{len(property_constraints)} constrained properties."
+            )
+        except ProjectFileError as e:
+            st.error(f"Failed to load project file: {e}")
+
+
+@st.cache_resource
+def open_persistent_graph(store_path):
+    """Open the on-disk combined graph at `store_path`, shared by every session."""
+    store = SQLiteStore()
+    store.open(store_path, create=True)
+    graph = Dataset(store=store, default_union=True)
+    drop_stale_staging_graphs(graph)
+    store.commit()
+    for prefix, uri in graph.namespaces():
+        add_namespace(namespaces, prefix, str(uri))
+    logger.info(f"Opened persistent ontology store {store_path} with {len(graph)} triples")
+    return graph
+
+def open_combined_graph(store_path=DEFAULT_STORE_PATH):
+    """Reopen a previously persisted combined graph, or start with an empty in-memory one."""
+    if store_path and Path(store_path).exists():
+        return open_persistent_graph(store_path)
+    return Dataset(default_union=True)
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def drop_stale_staging_graphs(combined_graph):
+    """Delete staged graphs that no load will apply: those of failed, cancelled or interrupted loads.
+
+    Staging ids carry the process id and job key of their load, so graphs still being written
+    by a running job, here or in another process sharing the store, are kept.
+    """
+    keep = []
+    for graph_id in graph_ids(combined_graph):
+        if not graph_id.startswith(STAGING_GRAPH_PREFIX):
+            continue
         try:
-            rdf_format = get_rdf_format(file.name)
-            if not rdf_format:
-                raise ValueError(f"Unsupported file format for {file.name}.")
+            pid, key, _ = graph_id[len(STAGING_GRAPH_PREFIX):].split(":", 2)
+            pid = int(pid)
+        except ValueError:
+            continue
+        if (key in running_job_keys()) if pid == os.getpid() else process_alive(pid):
+            keep.append(graph_id)
+    return combined_graph.store.remove_staging_graphs(keep=keep)
+
+def source_graph_id(content):
+    """Name the graph holding one source file's triples after a hash of the file content."""
+    return URIRef(SOURCE_GRAPH_PREFIX + hashlib.sha256(content).hexdigest())
+
+def graph_ids(combined_graph):
+    """Return the identifiers of every named graph in the store behind `combined_graph`."""
+    return {getattr(context, "identifier", context) for context in combined_graph.store.contexts()}
+
+def loaded_sources(combined_graph):
+    """Return the ids of the source graphs already loaded into `combined_graph`."""
+    if not isinstance(combined_graph, Dataset):
+        return set()
+    return {graph_id for graph_id in graph_ids(combined_graph) if graph_id.startswith(SOURCE_GRAPH_PREFIX)}
+
+def load_ontologies(file_list, combined_graph=None, job=None):
+    """Parse the ontology files that `combined_graph` does not hold yet.
+
+    Every file's triples live in a named graph keyed by a hash of its content, so
+    unchanged files are not parsed again and a revised or removed file only replaces
+    its own graph. Nothing visible changes here: the returned update is applied on the
+    script thread by apply_ontology_update. In the on-disk store the parsed files are
+    staged under temporary graph names. Progress and messages go to `job` when one is given.
+    """
+    if combined_graph is None:
+        combined_graph = Dataset(default_union=True)
+    persistent = isinstance(combined_graph.store, SQLiteStore)
+    existing = loaded_sources(combined_graph)
+    update = {"graph": combined_graph, "sources": [], "added": {}, "namespaces": []}
+
+    def report(file_name, status, level="info", message=None, **counts):
+        if job:
+            job.report(file_name, status, message=message, level=level, **counts)
+        elif message:
+            # "success" has no logger method and is logged as info
+            getattr(logger, level, logger.info)(message)
 
-            temp_graph = Graph()
+    try:
+        for file, namespace_url, namespace_shortname in file_list:
+            if job:
+                job.check_cancelled()
             file_content = file.getvalue()  # Use getvalue() instead of read() to avoid empty reads
-            temp_graph.parse(data=file_content, format=rdf_format)
+            source_id = source_graph_id(file_content)
+
+            if source_id in existing or source_id in update["added"]:
+                update["sources"].append(source_id)
+                update["namespaces"].append((namespace_shortname, namespace_url))
+                triples = len(Graph(store=combined_graph.store, identifier=source_id)) if source_id in existing else None
+                report(file.name, "unchanged", bytes_parsed=len(file_content), triples=triples)
+                continue
 
-            # Bind the namespace
+            report(file.name, "parsing")
+            try:
+                rdf_format = get_rdf_format(file.name)
+                if not rdf_format:
+                    raise ValueError(f"Unsupported file format for {file.name}.")
+
+                def parsing(position, file_name=file.name):
+                    report(file_name, "parsing", bytes_parsed=position)
+                    if job:
+                        job.check_cancelled()
+
+                # Chunked parsers (RDF/XML, N-Triples) report progress and stop on cancel mid-file
+                source = InputSource()
+                source.setByteStream(ProgressReader(file_content, parsing))
+                temp_graph = Graph()
+                temp_graph.parse(source=source, format=rdf_format)
+                report(file.name, "parsed", bytes_parsed=len(file_content), triples=len(temp_graph))
+                if job:
+                    job.check_cancelled()
+
+                if persistent:
+                    staging_id = URIRef(f"{STAGING_GRAPH_PREFIX}{os.getpid()}:{job.key if job else 'sync'}:{source_id}")
+                    staging_graph = Graph(store=combined_graph.store, identifier=staging_id, bind_namespaces="none")
+                    staging_graph.remove((None, None, None))
+                    staging_graph += temp_graph
+                    combined_graph.store.commit()
+                    update["added"][source_id] = staging_id
+                else:
+                    update["added"][source_id] = temp_graph
+                update["sources"].append(source_id)
+                update["namespaces"].append((namespace_shortname, namespace_url))
+
+                report(file.name, "loaded", "success",
+                       f"Ontology file '{file.name}' loaded successfully with namespace '{namespace_shortname}'.")
+
+            except LoadCancelled:
+                raise
+            except Exception as e:
+                report(file.name, "failed", "error", f"Failed to load ontology file '{file.name}': {e}")
+    except LoadCancelled:
+        discard_ontology_update(update)
+        raise
+
+    return update
+
+def discard_ontology_update(update):
+    """Drop the staged graphs of an update that will not be applied."""
+    for staged in update["added"].values():
+        if not isinstance(staged, Graph):
+            update["graph"].store.remove_graph(staged)
+    if isinstance(update["graph"].store, SQLiteStore):
+        update["graph"].store.commit()
+
+def apply_ontology_update(update):
+    """Swap the parsed source graphs into the combined graph and drop stale ones.
+
+    Only graphs of files that were added, revised or removed are touched, so the cost
+    follows the size of the changed files rather than of the whole ontology.
+    """
+    combined_graph = update["graph"]
+    with _apply_lock:
+        if update.get("applied"):
+            return combined_graph
+        sources = set(update["sources"])
+        stale = [
+            graph_id for graph_id in graph_ids(combined_graph)
+            if graph_id not in sources
+            and graph_id != DATASET_DEFAULT_GRAPH_ID
+            and not graph_id.startswith(STAGING_GRAPH_PREFIX)
+        ]
+        for graph_id in stale:
+            combined_graph.remove_graph(graph_id)
+
+        for source_id, staged in update["added"].items():
+            if isinstance(staged, Graph):
+                source_graph = combined_graph.graph(source_id)
+                source_graph += staged
+            else:
+                combined_graph.store.replace_context(staged, source_id)
+
+        for namespace_shortname, namespace_url in update["namespaces"]:
+            if not namespace_shortname or not namespace_url:
+                continue
             add_namespace(namespaces, namespace_shortname, namespace_url)
             combined_graph.namespace_manager.bind(namespace_shortname, Namespace(namespace_url))
-            combined_graph += temp_graph
 
-            st.success(f"Ontology file '{file.name}' loaded successfully with namespace '{namespace_shortname}'.")
-
-        except Exception as e:
-            st.error(f"Failed to load ontology file '{file.name}': {e}")
+        if isinstance(combined_graph.store, SQLiteStore):
+            drop_stale_staging_graphs(combined_graph)
+            combined_graph.store.commit()
+        update["applied"] = True
 
+    logger.info(
+        f"Combined graph updated: {len(update['added'])} files added, {len(stale)} graphs removed, "
+        f"{len(sources) - len(update['added'])} files unchanged"
+    )
     return combined_graph
 
+@st.cache_data(max_entries=64)
+def classes_in_source(source_id, _source_graph):
+    """List the classes one source graph declares; cached by the graph's content hash."""
+    return list(_source_graph.subjects(RDF.type, RDFS.Class))
+
+def get_ontology_classes(combined_graph):
+    """List the classes of the combined graph, reusing the results for unchanged files."""
+    if not isinstance(combined_graph, Dataset):
+        return list(combined_graph.subjects(RDF.type, RDFS.Class))
+    classes = {}
+    for source_id in sorted(loaded_sources(combined_graph)):
+        source_graph = Graph(store=combined_graph.store, identifier=source_id)
+        for class_uri in classes_in_source(str(source_id), source_graph):
+            classes.setdefault(class_uri, None)
+    return list(classes)
+
+def apply_finished_load_job():
+    """Apply the update of a finished background load and keep its messages for display."""
+    job = st.session_state.get("load_job")
+    if job is None or not job.done:
+        return False
+
+    messages = list(job.messages)
+    if job.status == "done":
+        st.session_state.combined_graph = apply_ontology_update(job.result)
+    elif job.status == "failed":
+        messages.append(("error", f"Failed to load ontologies: {job.error}"))
+    else:
+        messages.append(("info", "Ontology loading cancelled; the previously loaded graph is still in use."))
+
+    st.session_state.load_messages = messages
+    st.session_state.load_job = None
+    return True
+
+@st.fragment(run_every=1)
+def show_load_progress():
+    """Poll the running background load without rerunning the whole page."""
+    job = st.session_state.get("load_job")
+    if job is None:
+        return
+
+    if job.done:
+        apply_finished_load_job()
+        st.rerun()
+
+    for file_name, entry in list(job.progress.items()):
+        fraction = entry["bytes"] / entry["total_bytes"] if entry["total_bytes"] else 0.0
+        st.progress(
+            min(fraction, 1.0),
+            text=f"{file_name}: {entry['status']} ({entry['bytes']:,} bytes, {entry['triples']:,} triples)"
+        )
+    st.caption(
+        f"Loading for {time.monotonic() - job.started_at:.0f}s. "
+        "Other pages keep using the last loaded graph until this finishes."
+    )
+    if st.button("Cancel Loading"):
+        job.cancel()
+
 def display_classes_and_properties():
     st.subheader("Classes and Properties")
     """Display classes and their properties in a tree-like structure."""
@@ -448,7 +744,7 @@ def display_classes_and_properties():
     # Initialize session state for class-property mappings
 
     # Get all classes in the combined graph and sort them alphabetically by label
-    classes = list(st.session_state.combined_graph.subjects(RDF.type, RDFS.Class))
+    classes = get_ontology_classes(st.session_state.combined_graph)
     sorted_classes = sorted(classes, key=lambda class_uri: get_label(class_uri, st.session_state.combined_graph).lower())
 
     for class_uri in sorted_classes:
@@ -641,6 +937,77 @@ def render_constraint_input(constraint_name, constraint_config, current_value, e
     
     return value, True
 
+def display_constraint_rules(combined_graph, property_graph, class_property_map):
+    """Edit the ordered bulk constraint rules and show what they resolve to, read-only."""
+    st.markdown("### Bulk Constraint Rules")
+    st.caption(
+        "Rules are applied in order when SHACL is generated; the first matching rule sets each constraint. "
+        "Blank match columns match everything, namespace and class accept prefixed names, and notation is a "
+        "regular expression. A rule only replaces a value from the property file when 'override' is checked."
+    )
+
+    if "constraint_rules_editor_data" not in st.session_state:
+        st.session_state.constraint_rules_editor_data = list(st.session_state.get("constraint_rules", []))
+
+    rules_df = pd.DataFrame(st.session_state.constraint_rules_editor_data, columns=list(RULE_FIELDS))
+    rules_df = rules_df.astype({field: "object" for field in RULE_FIELDS if field != "override"})
+    rules_df["override"] = rules_df["override"].fillna(False).astype(bool)
+    rules_df["value"] = rules_df["value"].map(lambda v: None if v is None else str(v))
+
+    edited = st.data_editor(
+        rules_df,
+        num_rows="dynamic",
+        width="stretch",
+        key="constraint_rules_editor",
+        column_config={
+            "datatype": st.column_config.TextColumn("datatype", help="e.g. xsd:string"),
+            "namespace": st.column_config.TextColumn("namespace", help="Property namespace prefix or URI"),
+            "class": st.column_config.TextColumn("class", help="e.g. ceds:C200377"),
+            "notation": st.column_config.TextColumn("notation", help="Regular expression on the property's skos:notation"),
+            "constraint": st.column_config.SelectboxColumn("constraint", options=sorted(RULE_CONSTRAINTS)),
+            "value": st.column_config.TextColumn("value"),
+            "override": st.column_config.CheckboxColumn("override", default=False),
+        }
+    )
+
+    rules = []
+    for row in edited.to_dict("records"):
+        rule = {field: row[field] for field in RULE_FIELDS if field in row and not pd.isna(row[field]) and row[field] != ""}
+        if rule.get("constraint"):
+            rule["override"] = bool(rule.get("override", False))
+            rules.append(rule)
+    st.session_state.constraint_rules = rules
+
+    if not rules:
+        return {}
+
+    try:
+        compiled = compile_rules(rules, namespaces)
+    except RuleError as e:
+        st.error(str(e))
+        return {}
+
+    rule_constraints = evaluate_rules(compiled, combined_graph, class_property_map, property_graph)
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "class": get_label(URIRef(data["class"]), combined_graph),
+                    "property": get_label(URIRef(data["property"]), combined_graph),
+                    "constraint": name,
+                    "value": str(data["value"]),
+                    "rule": data["rule"]
+                }
+                for entry in rule_constraints.values()
+                for name, data in entry.items()
+            ],
+            columns=["class", "property", "constraint", "value", "rule"]
+        ),
+        hide_index=True,
+        width="stretch"
+    )
+    return rule_constraints
+
 def display_constraints():
     st.subheader("Constraints")
 
@@ -659,6 +1026,8 @@ def display_constraints():
     property_graph = st.session_state.property_graph
     class_property_map = st.session_state.class_property_map
 
+    rule_constraints = display_constraint_rules(combined_graph, property_graph, class_property_map)
+
     for class_uri, properties in class_property_map.items():
         class_label = get_label(class_uri, combined_graph)
         with st.expander(f"Class: {class_label}"):
@@ -668,6 +1037,12 @@ def display_constraints():
                 prop_label = get_label(prop_uri, combined_graph)
                 st.markdown(f"#### Property: {prop_label} (`{prop_uri}`)")
 
+                from_rules = rule_constraints.get(f"{class_uri}::{prop_uri}", {})
+                if from_rules:
+                    st.caption("Set by rules (edits below take precedence): " + ", ".join(
+                        f"{name} = {data['value']} (rule {data['rule']})" for name, data in from_rules.items()
+                    ))
+
                 if not shapes:
                     st.warning("No SHACL PropertyShape found for this property.")
                     continue
@@ -749,7 +1124,9 @@ def display_constraints():
                                 key_prefix
                             )
                             
-                            if is_enabled and value is not None:
+                            # Values that only repeat the property file are not stored, so they cannot mask a rule
+                            base_value = property_graph.value(shape, getattr(SH, constraint_name))
+                            if is_enabled and value is not None and is_custom_constraint(constraint_name, value, base_value):
                                 updated_constraints[constraint_name] = {
                                     "value": value,
                                     "enabled": True,
@@ -779,6 +1156,11 @@ def get_label(uri, graph):
 
 def show_SHACL():
     st.header("SHACL")
+    st.session_state.artifact_store_path = st.text_input(
+        "Artifact store path",
+        value=st.session_state.get("artifact_store_path") or DEFAULT_ARTIFACT_DIR,
+        help="Directory where generated artifacts are kept; the least recently used are evicted as it fills."
+    )
     if "class_property_map" in st.session_state and st.session_state.class_property_map:
         shacl_content = generate_shacl()
         if shacl_content:
@@ -791,6 +1173,31 @@ def show_SHACL():
                 height=400,
                 key="st-ace-editor",  # Assign a consistent key to target the editor
             )
+
+            store = artifact_store()
+            key = st.session_state.artifact_key
+            compression = st.selectbox(
+                "Download compression",
+                ["none"] + available_compressions(),
+                help="Compressed variants are precomputed when the artifacts are stored."
+            )
+            compression = None if compression == "none" else compression
+            for name, label, mime in ARTIFACT_DOWNLOADS:
+                st.download_button(
+                    label,
+                    data=store.read(key, name, compression),
+                    file_name=ARTIFACT_FILES[name] + COMPRESSION_SUFFIXES.get(compression, ""),
+                    mime=COMPRESSED_MIME_TYPES.get(compression, mime),
+                    key=f"download_{name}"
+                )
+
+        st.download_button(
+            "Download Ontology Module",
+            data=slice_ontology(st.session_state.combined_graph, st.session_state.class_property_map).serialize(format="turtle"),
+            file_name="Ontology_Module.ttl",
+            mime="text/turtle",
+            help="Minimal sub-ontology with only the selected classes, their properties, ranges and option sets."
+        )
     else:
         st.info("No SHACL content to display. Please select class-property mappings.")
 
@@ -801,33 +1208,295 @@ def update_class_property_map(class_uri, prop, key):
     else:
         st.session_state.class_property_map.get(str(class_uri), set()).discard(str(prop))
 
+def resolve_constraints(g, class_property_map, property_constraints, property_graph, rules=None):
+    """Overlay the per-property constraints on the results of the bulk constraint rules."""
+    if not rules:
+        return property_constraints
+    rule_constraints = evaluate_rules(compile_rules(rules, namespaces), g, class_property_map, property_graph)
+    # Per-property values that only repeat the property file (e.g. from older project files) must not mask a rule
+    edited = {}
+    for key, entry in property_constraints.items():
+        from_rules = rule_constraints.get(key, {})
+        edited[key] = {
+            name: data for name, data in entry.items()
+            if name not in from_rules or not data.get("shape") or property_graph is None
+            or is_custom_constraint(name, data.get("value"), property_graph.value(URIRef(data["shape"]), getattr(SH, name)))
+        }
+    return merge_constraints(rule_constraints, edited)
+
+def build_shapes(g, class_property_map, property_constraints, property_graph, context_terms=None, rules=None):
+    """Build the SHACL shape model for the class-property mappings without touching session state.
+
+    Pass a dict as `context_terms` to also collect the JSON-LD term crosswalk in the same pass.
+    Bulk constraint `rules` are resolved for the whole selection first; per-property
+    constraints take precedence over them. Raises RuleError for rules that do not compile.
+    Use `to_turtle()` on the result to serialize it, or `to_graph()` for an rdflib Graph.
+    """
+    property_constraints = resolve_constraints(g, class_property_map, property_constraints, property_graph, rules)
+    index = OntologyIndex.build(g, class_property_map, property_graph)
+    shacl_namespace = namespaces.get("ceds", Namespace("http://ceds.ed.gov/terms#"))  # Default to CEDS namespace
+    items = [(class_uri, properties) for class_uri, properties in class_property_map.items() if properties]  # Only include classes with properties
+
+    # Every namespace from the `namespaces` dictionary is available as a prefix
+    shapes = ShapeModel(namespaces)
+    for class_uri, properties in items:
+        create_node_shape(shapes, index, class_uri, {}, shacl_namespace, context_terms)
+        create_property_shapes(shapes, index, class_uri, properties, class_property_map, shacl_namespace, property_constraints, context_terms)
+
+    return shapes
+
+def graph_digest(g):
+    """Hash the triples of a graph in a stable order (blank node labels are not stable)."""
+    lines = sorted(g.serialize(format="nt").splitlines())
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+def property_graph_digest(g):
+    """Return the digest of a property graph, computed once per graph object (property graphs are not modified after loading)."""
+    digest = getattr(g, "content_digest", None)
+    if digest is None:
+        digest = g.content_digest = graph_digest(g)
+    return digest
+
+def shacl_artifact_inputs():
+    """Describe the session state that determines the generated artifacts, to key the artifact store."""
+    combined_graph = st.session_state.combined_graph
+    property_graph = st.session_state.property_graph
+    return {
+        # Source graphs are named after the content hash of their file
+        "sources": sorted(str(source_id) for source_id in loaded_sources(combined_graph)) or graph_digest(combined_graph),
+        "namespaces": sorted((prefix, str(uri)) for prefix, uri in namespaces.items()),
+        "graph_namespaces": sorted((prefix, str(uri)) for prefix, uri in combined_graph.namespaces()),
+        "selection": sorted(
+            [str(class_uri), sorted(str(prop_uri) for prop_uri in properties)]
+            for class_uri, properties in st.session_state.class_property_map.items() if properties
+        ),
+        "constraints": st.session_state.property_constraints,
+        "rules": st.session_state.get("constraint_rules") or [],
+        "property_graph": property_graph_digest(property_graph) if property_graph is not None else None
+    }
+
+def build_artifacts(shapes, context_terms, property_graph, names=ARTIFACT_FILES):
+    """Serialize the named artifacts (all by default) of a shape model to bytes."""
+    builders = {
+        "shacl": lambda: shapes.to_turtle(),
+        "ntriples": lambda: "".join(sorted(shapes.to_graph().serialize(format="nt").splitlines(keepends=True))),
+        "context": lambda: json.dumps(build_jsonld_context(context_terms), indent=4),
+        "bundle": lambda: build_validation_bundle(shapes, property_graph).serialize(format="turtle"),
+    }
+    return {name: builders[name]().encode("utf-8") for name in names}
+
+def artifact_store():
+    """Open the artifact store configured for this session."""
+    return ArtifactStore(st.session_state.get("artifact_store_path") or DEFAULT_ARTIFACT_DIR)
+
 def generate_shacl():
-    """Generate SHACL shapes from the selected class-property mappings."""
+    """Generate SHACL shapes and the other artifacts for the selection, or take them from the artifact store.
+
+    Returns the Turtle content; the store key of the artifacts is kept in `st.session_state.artifact_key`.
+    """
     if not st.session_state.class_property_map:
         st.warning("No class-property mappings selected.")
         return None
 
-    g1 = Graph()
-    # Dynamically bind all namespaces from the `namespaces` dictionary
-    for prefix, namespace in namespaces.items():
-        g1.namespace_manager.bind(prefix, namespace)  # Bind namespaces to the SHACL graph
+    store = artifact_store()
+    key = artifact_key(shacl_artifact_inputs())
+    if store.lookup(key) is not None:
+        st.session_state.artifact_key = key
+        st.success("SHACL shapes loaded from the artifact store (inputs unchanged).")
+        return store.read(key, "shacl").decode("utf-8")
 
-    shacl_namespace = namespaces.get("ceds", Namespace("http://ceds.ed.gov/terms#"))  # Default to CEDS namespace
-    for class_uri, properties in st.session_state.class_property_map.items():
-        if properties:  # Only include classes with properties
-            create_node_shape(g1, st.session_state.combined_graph, class_uri, {}, shacl_namespace)
-            create_property_shapes(g1, st.session_state.combined_graph, class_uri, properties, st.session_state.class_property_map, shacl_namespace)
+    context_terms = {}
+    try:
+        shapes = build_shapes(
+            st.session_state.combined_graph,
+            st.session_state.class_property_map,
+            st.session_state.property_constraints,
+            st.session_state.property_graph,
+            context_terms,
+            st.session_state.get("constraint_rules")
+        )
+    except RuleError as e:
+        st.error(f"Failed to apply constraint rules: {e}")
+        return None
 
-    # Serialize the SHACL graph to a string
+    # Serialize every artifact once; later requests for the same inputs are served from the store
     try:
-        shacl_content = g1.serialize(format="turtle")
+        store.put(key, build_artifacts(shapes, context_terms, st.session_state.property_graph))
+        st.session_state.artifact_key = key
         st.success("SHACL shapes generated successfully!")
-        return shacl_content
+        return store.read(key, "shacl").decode("utf-8")
     except Exception as e:
         st.error(f"Failed to generate SHACL: {e}")
         return None
 
 
+def copy_subject(module, g, subject):
+    """Copy every triple about `subject` into `module`, following blank nodes."""
+    pending = [subject]
+    seen = set()
+    while pending:
+        node = pending.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        for p, o in g.predicate_objects(node):
+            module.add((node, p, o))
+            if isinstance(o, BNode):
+                pending.append(o)
+
+def slice_ontology(g, class_property_map):
+    """Extract a minimal self-contained ontology module for the selected classes and properties.
+
+    The module holds the selected classes and properties, their range classes with any
+    option-set individuals, and the rdfs:subClassOf chain of every included class.
+    Property domains are limited to the classes in the module.
+    """
+    module = Graph()
+    for prefix, uri in g.namespaces():
+        module.namespace_manager.bind(prefix, uri, override=True)
+
+    classes = set()
+    properties = set()
+    for class_uri, property_uris in class_property_map.items():
+        if not property_uris:
+            continue
+        classes.add(URIRef(class_uri))
+        properties.update(URIRef(prop_uri) for prop_uri in property_uris)
+
+    for prop_uri in properties:
+        for range_uri in g.objects(prop_uri, SDO.rangeIncludes):
+            # Option sets are recognised by their individuals, whatever the range is typed as
+            if (range_uri, RDF.type, RDFS.Class) in g or next(g.subjects(RDF.type, range_uri), None) is not None:
+                classes.add(range_uri)
+
+    # Walk up the subclass chain so every included class keeps its ancestors
+    pending = list(classes)
+    while pending:
+        class_uri = pending.pop()
+        for parent in g.objects(class_uri, RDFS.subClassOf):
+            if isinstance(parent, URIRef) and parent not in classes:
+                classes.add(parent)
+                pending.append(parent)
+
+    for class_uri in classes:
+        copy_subject(module, g, class_uri)
+        # Option-set individuals are typed with the class they belong to
+        for individual in g.subjects(RDF.type, class_uri):
+            copy_subject(module, g, individual)
+
+    for prop_uri in properties:
+        copy_subject(module, g, prop_uri)
+        # Domains outside the module would refer to classes it does not define
+        for domain_uri in g.objects(prop_uri, SDO.domainIncludes):
+            if domain_uri not in classes:
+                module.remove((prop_uri, SDO.domainIncludes, domain_uri))
+
+    logger.info(f"Sliced ontology module with {len(classes)} classes, {len(properties)} properties and {len(module)} triples")
+    return module
+
+def list_items(g, node):
+    """Return the members of the RDF list at `node` as a tuple, or None if it is not a list."""
+    if g.value(node, RDF.first) is None:
+        return None
+    return tuple(Collection(g, node))
+
+def build_validation_bundle(shapes, property_graph=None):
+    """Merge the generated shapes with the base property shapes they use into one graph.
+
+    Starting from every shape in `shapes`, base shapes with the same URI or referenced by
+    URI (transitively) are copied from `property_graph` with their blank-node structures.
+    Base shapes nothing refers to are left out, and a base RDF list equal to one already
+    on the same subject and predicate is not copied twice.
+    """
+    bundle = shapes.to_graph()
+    if not property_graph:
+        return bundle
+    for prefix, namespace in property_graph.namespaces():
+        bundle.namespace_manager.bind(prefix, namespace, override=False)
+
+    generated = len(bundle)
+    pending = {node for triple in bundle for node in triple if isinstance(node, URIRef)}
+    visited = set()
+    base_shapes = 0
+    while pending:
+        node = pending.pop()
+        if node in visited:
+            continue
+        visited.add(node)
+        if (node, None, None) not in property_graph:
+            continue
+        base_shapes += 1
+
+        for p, o in property_graph.predicate_objects(node):
+            if isinstance(o, BNode):
+                items = list_items(property_graph, o)
+                if items is not None and any(
+                    list_items(bundle, existing) == items for existing in bundle.objects(node, p) if isinstance(existing, BNode)
+                ):
+                    continue
+            bundle.add((node, p, o))
+            # Copy blank-node structures (lists, sh:or alternatives) and queue the shapes they name
+            nested = [o] if isinstance(o, BNode) else []
+            if isinstance(o, URIRef):
+                pending.add(o)
+            while nested:
+                blank = nested.pop()
+                for bp, bo in property_graph.predicate_objects(blank):
+                    bundle.add((blank, bp, bo))
+                    if isinstance(bo, BNode):
+                        nested.append(bo)
+                    elif isinstance(bo, URIRef):
+                        pending.add(bo)
+
+    logger.info(
+        f"Built validation bundle with {generated} generated triples and "
+        f"{len(bundle) - generated} triples from {base_shapes} base shapes"
+    )
+    return bundle
+
+def add_context_term(context_terms, term, uri, is_iri=False):
+    """Record a notation-to-URI mapping for the JSON-LD context, keeping the first on conflict."""
+    existing = context_terms.get(term)
+    if existing is None:
+        context_terms[term] = (str(uri), is_iri)
+    elif existing[0] != str(uri):
+        logger.warning(f"JSON-LD term '{term}' already maps to {existing[0]}; skipping {uri}")
+
+def compact_uri(uri, prefixes):
+    """Compact a URI with the longest matching namespace, returning (prefix, compact form)."""
+    best = None
+    for prefix, namespace in prefixes.items():
+        namespace = str(namespace)
+        if uri.startswith(namespace) and len(uri) > len(namespace):
+            if best is None or len(namespace) > len(best[1]):
+                best = (prefix, namespace)
+    if best is None:
+        return None, uri
+    return best[0], f"{best[0]}:{uri[len(best[1]):]}"
+
+def build_jsonld_context(context_terms):
+    """Build a JSON-LD context document plus precomputed lookup tables from collected terms.
+
+    `terms` maps each term to its full URI and `reverse` maps full URIs back to terms,
+    so consumers can expand and compact with plain dictionary lookups.
+    """
+    context = {"rdf": str(RDF)}
+    term_definitions = {}
+    terms = {}
+    reverse = {}
+
+    for term in sorted(context_terms):
+        uri, is_iri = context_terms[term]
+        prefix, compact = compact_uri(uri, namespaces)
+        if prefix is not None:
+            context[prefix] = str(namespaces[prefix])
+        term_definitions[term] = {"@id": compact, "@type": "@id"} if is_iri else compact
+        terms[term] = uri
+        reverse[uri] = term
+
+    context.update(term_definitions)
+    return {"@context": context, "terms": terms, "reverse": reverse}
+
 def generate_sample_jsonld(shacl_content):
     """Generate a sample JSON-LD document based on the SHACL shapes."""
     try:
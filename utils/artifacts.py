@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # zstd variants are skipped when the package is not installed
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_DIR = "artifact_store"
+# Entries are evicted, least recently used first, once the store grows past this size or age
+DEFAULT_MAX_BYTES = 512 * 2**20
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+# Bump when generation changes so artifacts stored by older code are not served again
+ARTIFACT_FORMAT_VERSION = 1
+
+ARTIFACT_FILES = {
+    "shacl": "Filtered_SHACL.ttl",
+    "ntriples": "Filtered_SHACL.nt",
+    "context": "context.json",
+    "bundle": "SHACL_Bundle.ttl",
+}
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+MANIFEST = "manifest.json"
+
+
+def artifact_key(inputs):
+    """Hash everything that determines the generated artifacts into a store key."""
+    canonical = json.dumps(
+        {"version": ARTIFACT_FORMAT_VERSION, "inputs": inputs},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def file_digest(path):
+    """Return the SHA-256 of a file's content, or None when no path is given."""
+    if not path:
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def available_compressions():
+    """Compressions whose variants are written next to every artifact."""
+    return [name for name in COMPRESSION_SUFFIXES if name != "zstd" or zstandard is not None]
+
+
+def compress(data, compression):
+    if compression == "gzip":
+        # mtime=0 keeps the bytes, and so the variant, identical for identical content
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=19).compress(data)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+class ArtifactStore:
+    """Generated artifacts on disk, keyed by a hash of their inputs, with precompressed variants.
+
+    Storing an entry evicts entries not used for `max_age` seconds, then the least recently
+    used ones until the store fits in `max_bytes`. Pass None to lift either limit.
+    """
+
+    def __init__(self, root=DEFAULT_ARTIFACT_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def directory(self, key):
+        return self.root / key[:2] / key
+
+    def manifest(self, key):
+        """Return the manifest of a complete entry, or None if `key` is not stored."""
+        try:
+            with open(self.directory(key) / MANIFEST, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def __contains__(self, key):
+        return self.manifest(key) is not None
+
+    def lookup(self, key):
+        """Return the manifest for `key` like manifest(), marking the entry as recently used."""
+        manifest = self.manifest(key)
+        if manifest is not None:
+            try:
+                os.utime(self.directory(key) / MANIFEST)
+            except FileNotFoundError:
+                return None
+        return manifest
+
+    def path(self, key, name, compression=None):
+        """Return the file of one artifact, or of its `compression` variant."""
+        file_name = ARTIFACT_FILES[name] + (COMPRESSION_SUFFIXES[compression] if compression else "")
+        return self.directory(key) / file_name
+
+    def read(self, key, name, compression=None):
+        return self.path(key, name, compression).read_bytes()
+
+    def put(self, key, artifacts):
+        """Store artifacts (name -> bytes) with their compressed variants under `key`."""
+        directory = self.directory(key)
+        if key in self:
+            return self.manifest(key)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+
+        # Build the entry in a temporary directory and rename it, so readers only see complete entries
+        staging = Path(tempfile.mkdtemp(prefix=f".{key[:8]}-", dir=directory.parent))
+        manifest = {"key": key, "version": ARTIFACT_FORMAT_VERSION, "artifacts": {}}
+        try:
+            for name, data in artifacts.items():
+                entry = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data), "variants": {}}
+                (staging / ARTIFACT_FILES[name]).write_bytes(data)
+                for compression in available_compressions():
+                    compressed = compress(data, compression)
+                    (staging / (ARTIFACT_FILES[name] + COMPRESSION_SUFFIXES[compression])).write_bytes(compressed)
+                    entry["variants"][compression] = len(compressed)
+                manifest["artifacts"][name] = entry
+            with open(staging / MANIFEST, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=4)
+            os.replace(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            # Another process stored the same key first; its entry is identical
+            if key in self:
+                return self.manifest(key)
+            raise
+        logger.info(f"Stored {len(artifacts)} artifacts under {key[:12]}")
+        self.prune(keep=key)
+        return manifest
+
+    def entries(self):
+        """Return (last used, size in bytes, directory) for every complete entry."""
+        entries = []
+        for directory in self.root.glob("*/*"):
+            if directory.name.startswith("."):
+                continue
+            try:
+                last_used = (directory / MANIFEST).stat().st_mtime
+                size = sum(path.stat().st_size for path in directory.iterdir())
+            except FileNotFoundError:  # incomplete, or evicted by another process meanwhile
+                continue
+            entries.append((last_used, size, directory))
+        return entries
+
+    def prune(self, keep=None):
+        """Evict expired entries, then the least recently used ones until the store fits its size cap."""
+        if self.max_bytes is None and self.max_age is None:
+            return 0
+        entries = sorted(self.entries(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - self.max_age if self.max_age is not None else None
+        evicted = 0
+        for last_used, size, directory in entries:
+            expired = cutoff is not None and last_used < cutoff
+            oversized = self.max_bytes is not None and total > self.max_bytes
+            if not expired and not oversized:
+                break
+            if directory.name == keep:
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info(f"Evicted {evicted} artifact entries; {total / 2**20:.1f} MiB left in {self.root}")
+        return evicted
+
+    def get_or_create(self, key, build):
+        """Return the manifest for `key`, calling `build()` for the artifacts only if they are not stored yet."""
+        manifest = self.lookup(key)
+        if manifest is not None:
+            logger.info(f"Serving artifacts {key[:12]} from the store")
+            return manifest
+        return self.put(key, build())
@@ -0,0 +1,140 @@
+from rdflib import URIRef
+from rdflib.namespace import RDF, RDFS, SH, SKOS, SDO
+
+# Predicates of base property shapes that generation compares user constraints against
+CONSTRAINT_PREDICATES = (
+    "minCount", "maxCount", "minLength", "maxLength", "pattern", "nodeKind", "languageIn", "uniqueLang",
+    "minInclusive", "maxInclusive", "minExclusive", "maxExclusive"
+)
+
+
+class OntologyIndex:
+    """Read-only lookups from the ontology and property graphs needed to generate shapes.
+
+    Only the selected classes and properties and their range classes are indexed, so the
+    index stays small and can be pickled to worker processes instead of the full graphs.
+    """
+
+    __slots__ = ("notations", "ranges", "classes", "instances", "namespaces",
+                 "has_property_graph", "property_shapes", "shape_values")
+
+    def __init__(self):
+        self.notations = {}
+        self.ranges = {}
+        self.classes = set()
+        self.instances = {}
+        self.namespaces = []
+        self.has_property_graph = False
+        self.property_shapes = {}
+        self.shape_values = {}
+
+    @classmethod
+    def build(cls, g, class_property_map, property_graph=None, base=None):
+        """Index what generating shapes for `class_property_map` reads from `g` and `property_graph`.
+
+        Entries already in `base` (an earlier index, see invalidate) are reused rather than looked up again.
+        """
+        index = base if base is not None else cls()
+        index.namespaces = [(prefix, str(uri)) for prefix, uri in g.namespaces()]
+        index.has_property_graph = bool(property_graph)
+
+        for class_uri, property_uris in class_property_map.items():
+            index._add_notation(g, class_uri)
+            for prop_uri in property_uris:
+                if str(prop_uri) not in index.ranges:
+                    index._add_notation(g, prop_uri)
+                    index.ranges[str(prop_uri)] = list(g.objects(URIRef(prop_uri), SDO.rangeIncludes))
+                for range_uri in index.ranges[str(prop_uri)]:
+                    index._add_range(g, range_uri)
+                if index.has_property_graph and str(prop_uri) not in index.property_shapes:
+                    index._add_property_shapes(property_graph, prop_uri)
+        return index
+
+    def invalidate(self, terms):
+        """Forget what is indexed about `terms` so the next build looks them up again."""
+        for term in terms:
+            key = str(term)
+            self.notations.pop(key, None)
+            self.ranges.pop(key, None)
+            self.instances.pop(key, None)
+            self.classes.discard(key)
+
+    def invalidate_property_shapes(self, prop_uris=None):
+        """Forget what is indexed from the property graph for `prop_uris`, or for every property."""
+        if prop_uris is None:
+            self.property_shapes.clear()
+            self.shape_values.clear()
+            return
+        for prop_uri in prop_uris:
+            for shape in self.property_shapes.pop(str(prop_uri), []):
+                self.shape_values.pop(str(shape), None)
+
+    def _add_notation(self, g, uri):
+        if str(uri) not in self.notations:
+            notation = next(g.objects(URIRef(uri), SKOS.notation), None)
+            self.notations[str(uri)] = str(notation) if notation else None
+
+    def _add_range(self, g, range_uri):
+        key = str(range_uri)
+        if key in self.instances:
+            return
+        self._add_notation(g, range_uri)
+        if (range_uri, RDF.type, RDFS.Class) in g:
+            self.classes.add(key)
+        # Sorted so option-set lists do not depend on the store's iteration order
+        self.instances[key] = sorted(g.subjects(RDF.type, range_uri))
+
+    def _add_property_shapes(self, property_graph, prop_uri):
+        shapes = list(property_graph.subjects(predicate=SH.path, object=URIRef(prop_uri)))
+        self.property_shapes[str(prop_uri)] = shapes
+        for shape in shapes:
+            if str(shape) in self.shape_values:
+                continue
+            values = {}
+            for name in CONSTRAINT_PREDICATES:
+                value = property_graph.value(shape, SH[name])
+                if value is not None:
+                    values[name] = value
+            self.shape_values[str(shape)] = values
+
+    def class_inputs(self, class_uri, property_uris):
+        """Return everything indexed about a class and its properties, comparable between builds."""
+        inputs = [self.notation(class_uri)]
+        for prop_uri in sorted(property_uris, key=str):
+            shapes = tuple(
+                (str(shape), tuple(sorted((name, str(value)) for name, value in self.shape_values.get(str(shape), {}).items())))
+                for shape in self.shapes_for(prop_uri)
+            )
+            ranges = tuple(
+                (str(range_uri), self.notation(range_uri), self.namespace_for(range_uri), self.is_class(range_uri),
+                 tuple(str(instance) for instance in self.instances_of(range_uri)))
+                for range_uri in self.ranges_of(prop_uri)
+            )
+            inputs.append((str(prop_uri), self.notation(prop_uri), self.namespace_for(prop_uri), shapes, ranges))
+        return tuple(inputs)
+
+    def notation(self, uri):
+        return self.notations.get(str(uri))
+
+    def ranges_of(self, prop_uri):
+        return self.ranges.get(str(prop_uri), [])
+
+    def is_class(self, uri):
+        return str(uri) in self.classes
+
+    def instances_of(self, class_uri):
+        return self.instances.get(str(class_uri), [])
+
+    def namespace_for(self, uri):
+        """Return the first bound namespace that `uri` starts with, or its '#' namespace."""
+        uri = str(uri)
+        for prefix, namespace in self.namespaces:
+            if uri.startswith(namespace):
+                return namespace
+        return uri.rsplit("#", 1)[0] + "#"
+
+    def shapes_for(self, prop_uri):
+        return self.property_shapes.get(str(prop_uri), [])
+
+    def shape_value(self, shape, constraint_name):
+        return self.shape_values.get(str(shape), {}).get(constraint_name)
@@ -0,0 +1,211 @@
+import hashlib
+import io
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bytes a parser may consume between two progress reports
+PROGRESS_INTERVAL = 1 << 18
+
+# Jobs currently parsing, keyed by a hash of their inputs so identical requests share one job
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class LoadCancelled(Exception):
+    """Raised inside a load when its job has been cancelled."""
+
+
+class ProgressReader:
+    """Binary stream over file content that reports how far a parser has read.
+
+    Parsers that read their input in chunks, such as the RDF/XML and N-Triples
+    parsers, call `on_progress(position)` about every PROGRESS_INTERVAL bytes and
+    once at the end, so it can update progress and raise LoadCancelled mid-parse.
+    """
+
+    def __init__(self, data, on_progress):
+        self._buffer = io.BytesIO(data)
+        self._on_progress = on_progress
+        self._reported = 0
+
+    def _advance(self, chunk):
+        position = self._buffer.tell()
+        if not chunk or position - self._reported >= PROGRESS_INTERVAL:
+            self._reported = position
+            self._on_progress(position)
+        return chunk
+
+    def read(self, size=-1):
+        return self._advance(self._buffer.read(size))
+
+    def read1(self, size=-1):
+        return self._advance(self._buffer.read1(size))
+
+    def readline(self, size=-1):
+        return self._advance(self._buffer.readline(size))
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self._buffer.close()
+
+
+def load_job_key(file_list, target=None):
+    """Hash the target graph, file contents and namespace settings that determine a load's result."""
+    digest = hashlib.sha256(str(target).encode("utf-8"))
+    for file, namespace_url, namespace_shortname in file_list:
+        digest.update(hashlib.sha256(file.getvalue()).digest())
+        digest.update(f"\0{file.name}\0{namespace_url}\0{namespace_shortname}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class OntologyLoadJob:
+    """Runs an ontology load on a background thread and records its progress."""
+
+    def __init__(self, key, file_list, loader):
+        self.key = key
+        self.file_list = list(file_list)
+        self.loader = loader
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.messages = []
+        self.progress = {
+            file.name: {"bytes": 0, "total_bytes": len(file.getvalue()), "triples": 0, "status": "queued"}
+            for file, _, _ in self.file_list
+        }
+        self.started_at = None
+        self.finished_at = None
+        self.subscribers = 0
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"ontology-load-{key[:8]}", daemon=True)
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self.status = "running"
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def release(self):
+        """Drop one subscriber; the load is cancelled once no session is waiting for it."""
+        with _jobs_lock:
+            self.subscribers -= 1
+            last = self.subscribers <= 0
+        if last:
+            self.cancel()
+
+    def check_cancelled(self):
+        """Abort the load at the next safe point once cancellation was requested."""
+        if self._cancel_event.is_set():
+            raise LoadCancelled()
+
+    def report(self, file_name, status, bytes_parsed=None, triples=None, message=None, level="info"):
+        """Record progress for one file; called from the loading thread."""
+        entry = self.progress.setdefault(file_name, {"bytes": 0, "total_bytes": 0, "triples": 0, "status": status})
+        entry["status"] = status
+        if bytes_parsed is not None:
+            entry["bytes"] = bytes_parsed
+        if triples is not None:
+            entry["triples"] = triples
+        if message:
+            self.messages.append((level, message))
+
+    def _run(self):
+        try:
+            self.result = self.loader(self.file_list, job=self)
+            self.status = "done"
+        except LoadCancelled:
+            self.status = "cancelled"
+            logger.info(f"Ontology load {self.key[:8]} cancelled")
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+            logger.exception(f"Ontology load {self.key[:8]} failed: {e}")
+        finally:
+            self.finished_at = time.monotonic()
+            with _jobs_lock:
+                if _jobs.get(self.key) is self:
+                    del _jobs[self.key]
+
+
+def running_job_keys():
+    """Return the keys of the loads that are still in flight."""
+    with _jobs_lock:
+        return set(_jobs)
+
+
+class LoadSubscription:
+    """One session's view of a possibly shared load job.
+
+    Cancelling a subscription ends the wait for this session only; the job itself is
+    cancelled when its last subscriber cancels.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.cancelled = False
+
+    @property
+    def done(self):
+        return self.cancelled or self.job.done
+
+    @property
+    def status(self):
+        return "cancelled" if self.cancelled else self.job.status
+
+    @property
+    def result(self):
+        return self.job.result
+
+    @property
+    def error(self):
+        return self.job.error
+
+    @property
+    def messages(self):
+        return self.job.messages
+
+    @property
+    def progress(self):
+        return self.job.progress
+
+    @property
+    def started_at(self):
+        return self.job.started_at
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.job.release()
+
+
+def submit_load_job(file_list, loader, target=None):
+    """Start a background load, or subscribe to the job already in flight for identical inputs.
+
+    `target` identifies the graph the load updates; only loads into the same graph are shared.
+    Returns a LoadSubscription for the calling session.
+    """
+    key = load_job_key(file_list, target)
+    with _jobs_lock:
+        job = _jobs.get(key)
+        started = job is None or job.cancelled
+        if started:
+            job = _jobs[key] = OntologyLoadJob(key, file_list, loader)
+        job.subscribers += 1
+    if started:
+        job.start()
+    return LoadSubscription(job)
@@ -0,0 +1,144 @@
+import json
+import logging
+from rdflib import URIRef
+
+logger = logging.getLogger(__name__)
+
+PROJECT_FORMAT = "ceds-shacl-project"
+PROJECT_VERSION = 2
+# Version 1 files have no "rules" section and are still accepted
+SUPPORTED_VERSIONS = (1, 2)
+
+
+class ProjectFileError(ValueError):
+    """Raised when a project file cannot be read."""
+
+
+class _URITable:
+    """Interns URI strings to integer ids in first-seen order."""
+
+    def __init__(self):
+        self.ids = {}
+        self.uris = []
+
+    def intern(self, uri):
+        if uri is None:
+            return -1
+        uri = str(uri)
+        index = self.ids.get(uri)
+        if index is None:
+            index = self.ids[uri] = len(self.uris)
+            self.uris.append(uri)
+        return index
+
+
+def export_project(class_property_map, property_constraints, rules=None):
+    """Encode the selection, constraint and rule state as a compact project dictionary."""
+    table = _URITable()
+
+    selections = [
+        [table.intern(class_uri), sorted(table.intern(prop) for prop in properties)]
+        for class_uri, properties in class_property_map.items()
+        if properties
+    ]
+
+    constraints = []
+    for constraints_key, entry in property_constraints.items():
+        if not entry:
+            continue
+        class_uri, prop_uri = constraints_key.split("::", 1)
+        first = next(iter(entry.values()))
+        values = {
+            name: data["value"]
+            for name, data in entry.items()
+            if data.get("enabled", False)
+        }
+        constraints.append([
+            table.intern(class_uri),
+            table.intern(prop_uri),
+            table.intern(first.get("shape")),
+            table.intern(first.get("datatype")),
+            values
+        ])
+
+    return {
+        "format": PROJECT_FORMAT,
+        "version": PROJECT_VERSION,
+        "uris": table.uris,
+        "selections": selections,
+        "constraints": constraints,
+        "rules": [dict(rule) for rule in rules or []]
+    }
+
+
+def import_project(project):
+    """Decode a project dictionary into (class_property_map, property_constraints, rules)."""
+    if not isinstance(project, dict) or project.get("format") != PROJECT_FORMAT:
+        raise ProjectFileError("Not a CEDS SHACL project file.")
+    version = project.get("version")
+    if version not in SUPPORTED_VERSIONS:
+        raise ProjectFileError(f"Unsupported project file version: {version}")
+
+    def lookup(index, optional=False):
+        """Resolve a `uris` index; -1 stands for "no URI" where `optional` allows it."""
+        if optional and index == -1:
+            return None
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(uris):
+            raise ProjectFileError(f"Malformed project file: URI index {index!r} out of range")
+        return uris[index]
+
+    try:
+        uris = [URIRef(uri) for uri in project.get("uris", [])]
+        class_property_map = {
+            lookup(class_index): {lookup(prop_index) for prop_index in prop_indexes}
+            for class_index, prop_indexes in project.get("selections", [])
+        }
+
+        property_constraints = {}
+        for class_index, prop_index, shape_index, datatype_index, values in project.get("constraints", []):
+            class_uri, prop_uri = lookup(class_index), lookup(prop_index)
+            shape, datatype = lookup(shape_index, optional=True), lookup(datatype_index, optional=True)
+            property_constraints[f"{class_uri}::{prop_uri}"] = {
+                name: {
+                    "value": value,
+                    "enabled": True,
+                    "shape": str(shape) if shape is not None else None,
+                    "class": str(class_uri),
+                    "property": str(prop_uri),
+                    "datatype": str(datatype) if datatype is not None else None
+                }
+                for name, value in values.items()
+            }
+        rules = [dict(rule) for rule in project.get("rules", [])]
+    except ProjectFileError:
+        raise
+    except (AttributeError, IndexError, TypeError, ValueError) as e:
+        raise ProjectFileError(f"Malformed project file: {e}") from e
+
+    return class_property_map, property_constraints, rules
+
+
+def dumps_project(class_property_map, property_constraints, rules=None):
+    """Serialize the selection, constraint and rule state to project file bytes."""
+    project = export_project(class_property_map, property_constraints, rules)
+    return json.dumps(project, separators=(",", ":")).encode("utf-8")
+
+
+def loads_project(data):
+    """Parse project file bytes (or text) into (class_property_map, property_constraints, rules)."""
+    try:
+        project = json.loads(data)
+    except json.JSONDecodeError as e:
+        raise ProjectFileError(f"Project file is not valid JSON: {e}") from e
+    class_property_map, property_constraints, rules = import_project(project)
+    logger.info(
+        "Loaded project with %d classes, %d constrained properties and %d rules",
+        len(class_property_map), len(property_constraints), len(rules)
+    )
+    return class_property_map, property_constraints, rules
+
+
+def load_project_file(path):
+    """Read a project file from disk."""
+    with open(path, "rb") as f:
+        return loads_project(f.read())
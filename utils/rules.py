@@ -0,0 +1,186 @@
+import logging
+import re
+from rdflib import URIRef
+from rdflib.namespace import SH, SKOS, XSD
+
+logger = logging.getLogger(__name__)
+
+RULE_FIELDS = ("datatype", "namespace", "class", "notation", "constraint", "value", "override")
+
+INTEGER_CONSTRAINTS = {"minCount", "maxCount", "minLength", "maxLength"}
+NUMERIC_CONSTRAINTS = {"minInclusive", "maxInclusive", "minExclusive", "maxExclusive"}
+RULE_CONSTRAINTS = INTEGER_CONSTRAINTS | NUMERIC_CONSTRAINTS | {"pattern", "nodeKind", "languageIn", "uniqueLang"}
+
+
+class RuleError(ValueError):
+    """Raised when a constraint rule cannot be compiled."""
+
+
+def expand_name(value, namespaces):
+    """Expand a `prefix:local` name with the bound namespaces; full URIs pass through."""
+    value = str(value).strip()
+    if "://" in value or ":" not in value:
+        return value
+    prefix, local = value.split(":", 1)
+    if prefix == "xsd":
+        return f"{XSD}{local}"
+    namespace = namespaces.get(prefix)
+    return f"{namespace}{local}" if namespace is not None else value
+
+
+def namespace_of(uri):
+    """Return the namespace part of a URI (up to the last '#' or '/')."""
+    uri = str(uri)
+    cut = max(uri.rfind("#"), uri.rfind("/"))
+    return uri[:cut + 1]
+
+
+def coerce_rule_value(constraint, value):
+    """Convert a rule value (often text from the editor) to the type its constraint expects."""
+    if constraint in INTEGER_CONSTRAINTS:
+        return int(float(value))
+    if constraint in NUMERIC_CONSTRAINTS:
+        number = float(value)
+        return int(number) if number.is_integer() and "." not in str(value) else number
+    if constraint == "uniqueLang":
+        return value if isinstance(value, bool) else str(value).strip().lower() in ("true", "1", "yes", "on")
+    return str(value)
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and value != value) or str(value).strip() == ""
+
+
+class CompiledRules:
+    """Ordered constraint rules indexed by datatype, namespace and class.
+
+    Each dimension maps a key to a bitmask of the rules that name it, plus a mask of
+    rules that leave the dimension open. The candidates for a property are the AND of
+    its three masks, so only rules that can match are examined, lowest order first.
+    """
+
+    def __init__(self, rules, namespaces):
+        self.rules = []
+        self.patterns = []
+        self.indexes = {"datatype": {}, "namespace": {}, "class": {}}
+        self.wildcards = {"datatype": 0, "namespace": 0, "class": 0}
+
+        for order, rule in enumerate(rules):
+            constraint = str(rule.get("constraint") or "").strip()
+            if constraint not in RULE_CONSTRAINTS:
+                raise RuleError(f"Rule {order + 1}: unknown constraint '{constraint}'")
+            if _is_blank(rule.get("value")):
+                raise RuleError(f"Rule {order + 1}: a value is required")
+            try:
+                value = coerce_rule_value(constraint, rule["value"])
+            except (TypeError, ValueError) as e:
+                raise RuleError(f"Rule {order + 1}: invalid value for {constraint}: {e}") from e
+
+            pattern = None
+            if not _is_blank(rule.get("notation")):
+                try:
+                    pattern = re.compile(str(rule["notation"]))
+                except re.error as e:
+                    raise RuleError(f"Rule {order + 1}: invalid notation pattern: {e}") from e
+
+            bit = 1 << order
+            for dimension in self.indexes:
+                key = rule.get(dimension)
+                if _is_blank(key):
+                    self.wildcards[dimension] |= bit
+                    continue
+                key = expand_name(key, namespaces)
+                if dimension == "namespace" and not key.endswith(("#", "/")):
+                    key = str(namespaces.get(key, key))
+                self.indexes[dimension][key] = self.indexes[dimension].get(key, 0) | bit
+
+            self.rules.append((constraint, value, bool(rule.get("override", False))))
+            self.patterns.append(pattern)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def candidates(self, datatype, namespace, class_uri):
+        mask = -1
+        for dimension, key in (("datatype", datatype), ("namespace", namespace), ("class", class_uri)):
+            mask &= self.indexes[dimension].get(key, 0) | self.wildcards[dimension]
+            if not mask:
+                return 0
+        return mask
+
+    def match(self, datatype, namespace, class_uri, notation):
+        """Yield (order, constraint, value, override) for every rule matching a property, in order."""
+        mask = self.candidates(datatype, namespace, class_uri)
+        while mask:
+            low = mask & -mask
+            order = low.bit_length() - 1
+            mask ^= low
+            pattern = self.patterns[order]
+            if pattern is not None and (notation is None or not pattern.search(notation)):
+                continue
+            constraint, value, override = self.rules[order]
+            yield order, constraint, value, override
+
+
+def compile_rules(rules, namespaces):
+    """Compile an ordered list of rule dictionaries into indexed lookups."""
+    return CompiledRules(rules or [], namespaces)
+
+
+def evaluate_rules(compiled, g, class_property_map, property_graph):
+    """Resolve the rule constraints for the whole selection in a single pass.
+
+    The first matching rule sets each constraint. A rule does not replace a value the
+    base PropertyShapes file already defines unless the rule sets `override`. Properties
+    without a base PropertyShape are skipped, as generation ignores their constraints.
+    Returns constraints keyed like `st.session_state.property_constraints`, with the
+    originating rule number recorded under "rule".
+    """
+    resolved = {}
+    if not compiled or not len(compiled):
+        return resolved
+
+    for class_uri, property_uris in class_property_map.items():
+        for prop_uri in property_uris:
+            prop_ref = URIRef(prop_uri)
+            shape = next(property_graph.subjects(SH.path, prop_ref), None) if property_graph else None
+            if shape is None:
+                # Constraints are only generated for properties with a base PropertyShape
+                continue
+            datatype = property_graph.value(shape, SH.datatype)
+            notation = g.value(prop_ref, SKOS.notation)
+
+            entry = {}
+            matches = compiled.match(
+                str(datatype) if datatype is not None else None,
+                namespace_of(prop_uri),
+                str(class_uri),
+                str(notation) if notation is not None else None
+            )
+            for order, constraint, value, override in matches:
+                if constraint in entry:
+                    continue
+                if not override and property_graph.value(shape, SH[constraint]) is not None:
+                    continue
+                entry[constraint] = {
+                    "value": value,
+                    "enabled": True,
+                    "shape": str(shape),
+                    "class": str(class_uri),
+                    "property": str(prop_uri),
+                    "datatype": str(datatype) if datatype is not None else None,
+                    "rule": order + 1
+                }
+            if entry:
+                resolved[f"{class_uri}::{prop_uri}"] = entry
+
+    logger.info(f"Constraint rules set values on {len(resolved)} properties")
+    return resolved
+
+
+def merge_constraints(rule_constraints, property_constraints):
+    """Overlay the per-property constraints from the UI on top of rule results."""
+    merged = {key: dict(entry) for key, entry in rule_constraints.items()}
+    for key, entry in property_constraints.items():
+        merged.setdefault(key, {}).update(entry)
+    return merged
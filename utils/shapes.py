@@ -0,0 +1,278 @@
+import re
+import sys
+from rdflib import Graph, URIRef, Literal as RDFLiteral, BNode
+from rdflib.collection import Collection
+from rdflib.namespace import RDF, RDFS, SH, XSD, SDO
+
+intern = sys.intern
+
+SH_NS = str(SH)
+XSD_NS = str(XSD)
+RDF_TYPE = intern(str(RDF.type))
+SH_PATH = intern(str(SH.path))
+SH_PROPERTY = intern(str(SH.property))
+SH_TARGET_CLASS = intern(str(SH.targetClass))
+SH_CLOSED = intern(str(SH.closed))
+SH_IGNORED_PROPERTIES = intern(str(SH.ignoredProperties))
+SH_NODE_SHAPE = intern(str(SH.NodeShape))
+SH_PROPERTY_SHAPE = intern(str(SH.PropertyShape))
+
+DEFAULT_PREFIXES = {
+    "rdf": str(RDF),
+    "rdfs": str(RDFS),
+    "sh": SH_NS,
+    "xsd": XSD_NS,
+    "schema": str(SDO),
+}
+
+LOCAL_NAME = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_\-]*$")
+
+
+class Literal:
+    """A literal value with an optional datatype URI."""
+
+    __slots__ = ("value", "datatype")
+
+    def __init__(self, value, datatype=None):
+        self.value = value
+        self.datatype = intern(str(datatype)) if datatype is not None else None
+
+    @classmethod
+    def of(cls, value):
+        """Wrap a Python value with the datatype rdflib would infer for it."""
+        if isinstance(value, bool):
+            return cls(value, XSD.boolean)
+        if isinstance(value, int):
+            return cls(value, XSD.integer)
+        if isinstance(value, float):
+            return cls(value, XSD.double)
+        return cls(str(value))
+
+    def __eq__(self, other):
+        return isinstance(other, Literal) and (self.value, self.datatype) == (other.value, other.datatype)
+
+    def __hash__(self):
+        return hash((self.value, self.datatype))
+
+    def to_rdflib(self):
+        return RDFLiteral(self.value, datatype=URIRef(self.datatype) if self.datatype else None)
+
+
+def iri(uri):
+    """Intern a URI so repeated references share one string."""
+    return intern(str(uri))
+
+
+class NodeShape:
+    """A sh:NodeShape targeting one class."""
+
+    __slots__ = ("uri", "target_classes", "closed", "ignored_properties", "properties")
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.target_classes = []
+        self.closed = None
+        self.ignored_properties = None
+        self.properties = []
+
+    def add_target_class(self, class_uri):
+        class_uri = iri(class_uri)
+        if class_uri not in self.target_classes:
+            self.target_classes.append(class_uri)
+
+    def add_property(self, shape_uri):
+        shape_uri = iri(shape_uri)
+        if shape_uri not in self.properties:
+            self.properties.append(shape_uri)
+
+    def predicate_objects(self):
+        yield RDF_TYPE, [SH_NODE_SHAPE]
+        if self.closed is not None:
+            yield SH_CLOSED, [Literal(self.closed, XSD.boolean)]
+        if self.ignored_properties is not None:
+            yield SH_IGNORED_PROPERTIES, [self.ignored_properties]
+        if self.properties:
+            yield SH_PROPERTY, self.properties
+        if self.target_classes:
+            yield SH_TARGET_CLASS, self.target_classes
+
+
+class PropertyShape:
+    """A sh:PropertyShape; `declared` is set once its type and sh:path are asserted."""
+
+    __slots__ = ("uri", "declared", "path", "values")
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.declared = False
+        self.path = None
+        self.values = {}
+
+    def declare(self, path):
+        """Assert rdf:type sh:PropertyShape and the sh:path of this shape."""
+        self.declared = True
+        self.path = iri(path)
+
+    def add(self, predicate, value):
+        """Add a value (URI string, Literal or tuple for an RDF list) for a SHACL predicate."""
+        values = self.values.setdefault(iri(predicate), [])
+        if value not in values:
+            values.append(value)
+
+    def is_empty(self):
+        return not self.declared and not self.values
+
+    def predicate_objects(self):
+        if self.declared:
+            yield RDF_TYPE, [SH_PROPERTY_SHAPE]
+            yield SH_PATH, [self.path]
+        yield from self.values.items()
+
+
+class ShapeModel:
+    """Node and property shapes for one SHACL document, convertible to Turtle or rdflib."""
+
+    __slots__ = ("node_shapes", "property_shapes", "prefixes")
+
+    def __init__(self, prefixes=None):
+        self.node_shapes = {}
+        self.property_shapes = {}
+        self.prefixes = dict(DEFAULT_PREFIXES)
+        for prefix, namespace in (prefixes or {}).items():
+            self.prefixes[prefix] = str(namespace)
+
+    def node_shape(self, uri):
+        uri = iri(uri)
+        shape = self.node_shapes.get(uri)
+        if shape is None:
+            shape = self.node_shapes[uri] = NodeShape(uri)
+        return shape
+
+    def property_shape(self, uri):
+        uri = iri(uri)
+        shape = self.property_shapes.get(uri)
+        if shape is None:
+            shape = self.property_shapes[uri] = PropertyShape(uri)
+        return shape
+
+    def merge(self, other):
+        """Add every shape of another model (e.g. a worker's fragment) to this one."""
+        for uri, shape in other.node_shapes.items():
+            target = self.node_shape(uri)
+            for class_uri in shape.target_classes:
+                target.add_target_class(class_uri)
+            if shape.closed is not None:
+                target.closed = shape.closed
+            if shape.ignored_properties is not None:
+                target.ignored_properties = tuple(iri(uri) for uri in shape.ignored_properties)
+            for shape_uri in shape.properties:
+                target.add_property(shape_uri)
+        for uri, shape in other.property_shapes.items():
+            target = self.property_shape(uri)
+            if shape.declared:
+                target.declare(shape.path)
+            for predicate, values in shape.values.items():
+                for value in values:
+                    target.add(predicate, iri(value) if isinstance(value, str) else value)
+
+    def has_property_shape(self, uri):
+        shape = self.property_shapes.get(uri)
+        return shape is not None and not shape.is_empty()
+
+    def shapes(self):
+        """Yield every non-empty shape in a deterministic order."""
+        for uri in sorted(self.node_shapes.keys() | self.property_shapes.keys()):
+            for shape in (self.node_shapes.get(uri), self.property_shapes.get(uri)):
+                if shape is not None and not (isinstance(shape, PropertyShape) and shape.is_empty()):
+                    yield shape
+
+    def __len__(self):
+        return sum(1 for _ in self.shapes())
+
+    def to_graph(self):
+        """Convert the model into an rdflib Graph."""
+        g1 = Graph()
+        for prefix, namespace in self.prefixes.items():
+            g1.namespace_manager.bind(prefix, namespace, override=True)
+
+        def term(value):
+            if isinstance(value, Literal):
+                return value.to_rdflib()
+            if isinstance(value, tuple):
+                list_node = BNode()
+                Collection(g1, list_node, [term(item) for item in value])
+                return list_node
+            return URIRef(value)
+
+        for shape in self.shapes():
+            subject = URIRef(shape.uri)
+            for predicate, values in shape.predicate_objects():
+                for value in values:
+                    g1.add((subject, URIRef(predicate), term(value)))
+        return g1
+
+    def to_turtle(self):
+        """Serialize the model straight to Turtle without building an rdflib Graph."""
+        writer = _TurtleWriter(self.prefixes)
+        body = []
+        for shape in self.shapes():
+            body.append(writer.subject_block(shape))
+        header = "".join(
+            f"@prefix {prefix}: <{namespace}> .\n"
+            for prefix, namespace in sorted(writer.used_prefixes.items())
+        )
+        return header + "\n" + "\n".join(body)
+
+
+class _TurtleWriter:
+    """Formats shape records as Turtle, tracking which prefixes are used."""
+
+    def __init__(self, prefixes):
+        # Longest namespace first so nested namespaces compact correctly
+        self.namespaces = sorted(prefixes.items(), key=lambda item: len(item[1]), reverse=True)
+        self.prefixes = dict(prefixes)
+        self.used_prefixes = {}
+        self._cache = {}
+
+    def uri(self, uri):
+        compact = self._cache.get(uri)
+        if compact is None:
+            compact = f"<{uri}>"
+            for prefix, namespace in self.namespaces:
+                if uri.startswith(namespace) and LOCAL_NAME.match(uri[len(namespace):]):
+                    compact = f"{prefix}:{uri[len(namespace):]}"
+                    break
+            self._cache[uri] = compact
+        prefix = compact.split(":", 1)[0] if not compact.startswith("<") else None
+        if prefix is not None:
+            self.used_prefixes[prefix] = self.prefixes[prefix]
+        return compact
+
+    def literal(self, literal):
+        value = literal.value
+        if literal.datatype == str(XSD.boolean):
+            return "true" if value else "false"
+        if literal.datatype == str(XSD.integer) and isinstance(value, int):
+            return str(value)
+        text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        text = text.replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+        if literal.datatype:
+            return f'"{text}"^^{self.uri(literal.datatype)}'
+        return f'"{text}"'
+
+    def value(self, value):
+        if isinstance(value, Literal):
+            return self.literal(value)
+        if isinstance(value, tuple):
+            return "( " + " ".join(self.value(item) for item in value) + " )"
+        return self.uri(value)
+
+    def subject_block(self, shape):
+        lines = []
+        for predicate, values in shape.predicate_objects():
+            # rdf:type first, then predicates in alphabetical order
+            name = "a" if predicate == RDF_TYPE else self.uri(predicate)
+            objects = sorted(self.value(value) for value in values)
+            lines.append((name != "a", name, f"{name} " + ",\n        ".join(objects)))
+        lines.sort()
+        return f"{self.uri(shape.uri)} " + " ;\n    ".join(line for _, _, line in lines) + " .\n"
@@ -0,0 +1,255 @@
+import sqlite3
+import threading
+from pathlib import Path
+from rdflib import Graph, URIRef
+from rdflib.store import Store, VALID_STORE, NO_STORE
+from rdflib.util import from_n3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quads (
+    s TEXT NOT NULL,
+    p TEXT NOT NULL,
+    o TEXT NOT NULL,
+    c TEXT NOT NULL,
+    UNIQUE (s, p, o, c)
+);
+CREATE INDEX IF NOT EXISTS idx_quads_sp ON quads (s, p);
+CREATE INDEX IF NOT EXISTS idx_quads_po ON quads (p, o);
+CREATE INDEX IF NOT EXISTS idx_quads_p ON quads (p);
+CREATE INDEX IF NOT EXISTS idx_quads_c ON quads (c);
+CREATE TABLE IF NOT EXISTS graphs (
+    c TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT PRIMARY KEY,
+    uri TEXT NOT NULL
+);
+"""
+
+FETCH_SIZE = 1000
+# Contexts under this prefix hold loads that are not applied yet; union reads leave them out
+STAGING_GRAPH_PREFIX = "urn:ceds-shacl-generator:staging:"
+_STAGING_ID = f"<{STAGING_GRAPH_PREFIX}"
+_IS_STAGING = "substr(c, 1, ?) = ?"
+
+
+def _encode(term):
+    """Encode an RDF term as its N3 string for storage."""
+    return term.n3()
+
+
+def _decode(value):
+    """Decode an N3 string from storage back into an RDF term."""
+    return from_n3(value)
+
+
+def _context_id(context):
+    """Return the identifier string used to key a context."""
+    if context is None:
+        return None
+    identifier = context.identifier if isinstance(context, Graph) else context
+    return _encode(identifier)
+
+
+class SQLiteStore(Store):
+    """Embedded on-disk rdflib store backed by a single SQLite file."""
+
+    context_aware = True
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = True
+
+    def __init__(self, configuration=None, identifier=None):
+        self._conn = None
+        self._lock = threading.RLock()
+        self.identifier = identifier
+        super().__init__(configuration, identifier)
+
+    def open(self, configuration, create=True):
+        """Open (and optionally create) the SQLite database at `configuration`."""
+        path = Path(configuration)
+        if not create and not path.exists():
+            return NO_STORE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.commit()
+                self._conn.close()
+            self._conn = None
+
+    def destroy(self, configuration):
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{configuration}{suffix}").unlink(missing_ok=True)
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def rollback(self):
+        with self._lock:
+            self._conn.rollback()
+
+    def add(self, triple, context, quoted=False):
+        s, p, o = triple
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO quads (s, p, o, c) VALUES (?, ?, ?, ?)",
+                (_encode(s), _encode(p), _encode(o), _context_id(context)),
+            )
+        super().add(triple, context, quoted)
+
+    def addN(self, quads):
+        rows = ((_encode(s), _encode(p), _encode(o), _context_id(c)) for s, p, o, c in quads)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO quads (s, p, o, c) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def add_graph(self, graph):
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO graphs (c) VALUES (?)", (_context_id(graph),))
+
+    def remove_graph(self, graph):
+        context_id = _context_id(graph)
+        with self._lock:
+            self._conn.execute("DELETE FROM quads WHERE c = ?", (context_id,))
+            self._conn.execute("DELETE FROM graphs WHERE c = ?", (context_id,))
+
+    def remove_staging_graphs(self, keep=()):
+        """Delete every staged graph except those whose identifiers are in `keep`."""
+        keep = {_context_id(graph) for graph in keep}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT c FROM graphs WHERE {_IS_STAGING} UNION SELECT DISTINCT c FROM quads WHERE {_IS_STAGING}",
+                (len(_STAGING_ID), _STAGING_ID) * 2,
+            ).fetchall()
+            stale = [(context_id,) for (context_id,) in rows if context_id not in keep]
+            self._conn.executemany("DELETE FROM quads WHERE c = ?", stale)
+            self._conn.executemany("DELETE FROM graphs WHERE c = ?", stale)
+        return len(stale)
+
+    def replace_context(self, source, target):
+        """Atomically replace the triples of context `target` with those of `source`."""
+        source_id, target_id = _context_id(source), _context_id(target)
+        with self._lock:
+            self._conn.execute("DELETE FROM quads WHERE c = ?", (target_id,))
+            self._conn.execute("UPDATE quads SET c = ? WHERE c = ?", (target_id, source_id))
+            self._conn.execute("DELETE FROM graphs WHERE c = ?", (source_id,))
+            self._conn.execute("INSERT OR IGNORE INTO graphs (c) VALUES (?)", (target_id,))
+            self._conn.commit()
+
+    def _rows(self, sql, params):
+        """Stream result rows in batches so large scans stay memory bounded."""
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                batch = cursor.fetchmany(FETCH_SIZE)
+            if not batch:
+                return
+            yield from batch
+
+    def _where(self, triple_pattern, context):
+        clauses, params = [], []
+        for column, term in zip(("s", "p", "o"), triple_pattern):
+            if term is not None:
+                clauses.append(f"{column} = ?")
+                params.append(_encode(term))
+        context_id = _context_id(context)
+        if context_id is not None:
+            clauses.append("c = ?")
+            params.append(context_id)
+        else:
+            clauses.append(f"NOT {_IS_STAGING}")
+            params.extend((len(_STAGING_ID), _STAGING_ID))
+        return f" WHERE {' AND '.join(clauses)}", params
+
+    def remove(self, triple_pattern, context=None):
+        where, params = self._where(triple_pattern, context)
+        with self._lock:
+            self._conn.execute(f"DELETE FROM quads{where}", params)
+        super().remove(triple_pattern, context)
+
+    def triples(self, triple_pattern, context=None):
+        where, params = self._where(triple_pattern, context)
+        if context is not None:
+            for s, p, o in self._rows(f"SELECT s, p, o FROM quads{where}", params):
+                yield (_decode(s), _decode(p), _decode(o)), iter((context,))
+            return
+
+        rows = self._rows(
+            f"SELECT s, p, o, group_concat(c, char(31)) FROM quads{where} GROUP BY s, p, o",
+            params,
+        )
+        for s, p, o, contexts in rows:
+            yield (
+                (_decode(s), _decode(p), _decode(o)),
+                (Graph(store=self, identifier=_decode(c)) for c in contexts.split("\x1f")),
+            )
+
+    def __len__(self, context=None):
+        if context is None:
+            sql = f"SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o FROM quads WHERE NOT {_IS_STAGING})"
+            params = [len(_STAGING_ID), _STAGING_ID]
+        else:
+            sql, params = "SELECT COUNT(*) FROM quads WHERE c = ?", [_context_id(context)]
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def contexts(self, triple=None):
+        if triple is None:
+            sql, params = "SELECT c FROM graphs UNION SELECT DISTINCT c FROM quads", []
+        else:
+            where, params = self._where(triple, None)
+            sql = f"SELECT DISTINCT c FROM quads{where}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        for (context_id,) in rows:
+            yield _decode(context_id)
+
+    def bind(self, prefix, namespace, override=True):
+        with self._lock:
+            existing = self._conn.execute(
+                "SELECT prefix FROM namespaces WHERE uri = ?", (str(namespace),)
+            ).fetchone()
+            if existing and not override:
+                return
+            bound = self._conn.execute(
+                "SELECT uri FROM namespaces WHERE prefix = ?", (prefix,)
+            ).fetchone()
+            if bound and not override:
+                return
+            self._conn.execute("DELETE FROM namespaces WHERE uri = ?", (str(namespace),))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO namespaces (prefix, uri) VALUES (?, ?)",
+                (prefix, str(namespace)),
+            )
+
+    def namespace(self, prefix):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT uri FROM namespaces WHERE prefix = ?", (prefix,)
+            ).fetchone()
+        return URIRef(row[0]) if row else None
+
+    def prefix(self, namespace):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT prefix FROM namespaces WHERE uri = ?", (str(namespace),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def namespaces(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT prefix, uri FROM namespaces").fetchall()
+        for prefix, uri in rows:
+            yield prefix, URIRef(uri)
@@ -0,0 +1,150 @@
+import json
+import logging
+import time
+from pathlib import Path
+from rdflib import Namespace
+from rdflib.namespace import SH
+from utils.shapes import ShapeModel
+from utils.index import OntologyIndex
+from utils.SHACL import (
+    namespaces,
+    resolve_constraints,
+    create_node_shape,
+    create_property_shapes,
+    add_context_term
+)
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.25
+
+
+class SourceFile:
+    """An ontology file on disk, read the same way as an uploaded file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.name = self.path.name
+        self.file_id = str(self.path)
+
+    def getvalue(self):
+        return self.path.read_bytes()
+
+
+class FileWatcher:
+    """Polls input files and reports those whose size or modification time changed."""
+
+    def __init__(self, paths):
+        self.stats = {Path(path): self._stat(Path(path)) for path in paths if path}
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self):
+        """Return the paths that changed since the last call."""
+        changed = set()
+        for path, previous in self.stats.items():
+            current = self._stat(path)
+            if current != previous:
+                self.stats[path] = current
+                changed.add(path)
+        return changed
+
+    def wait(self, poll_interval=POLL_INTERVAL):
+        """Block until files change, then until they stop changing for one poll interval."""
+        changed = set()
+        while not changed:
+            time.sleep(poll_interval)
+            changed = self.changed()
+        # Editors often write a file in several steps; let the burst settle first
+        while True:
+            time.sleep(poll_interval)
+            more = self.changed()
+            if not more:
+                return changed
+            changed |= more
+
+
+class IncrementalShapeBuilder:
+    """Builds shapes class by class and reuses the fragments of classes whose inputs did not change.
+
+    A class's inputs are what the ontology index holds about it and its properties, which
+    of its range classes are selected, and its resolved constraints. The index itself is
+    kept between builds; call invalidate with the changed triples before building again.
+    Fragments are merged in selection order, so the output matches build_shapes.
+    """
+
+    def __init__(self):
+        self.fragments = {}
+        self.index = None
+
+    def invalidate(self, graphs):
+        """Forget the indexed facts about every term used in `graphs`, e.g. the old and new triples of an edited file."""
+        if self.index is None:
+            return
+        terms = set()
+        for graph in graphs:
+            for s, p, o in graph:
+                terms.add(s)
+                terms.add(o)
+        self.index.invalidate(terms)
+
+    def invalidate_property_shapes(self, old_graph, new_graph):
+        """Forget the indexed base shapes whose triples differ between two versions of the property graph."""
+        if self.index is None:
+            return
+        if old_graph is None or new_graph is None:
+            self.index.invalidate_property_shapes()
+            return
+        shapes = {s for s, p, o in set(old_graph) ^ set(new_graph)}
+        paths = set()
+        for graph in (old_graph, new_graph):
+            for shape in shapes:
+                paths.update(graph.objects(shape, SH.path))
+        self.index.invalidate_property_shapes(paths)
+
+    def build(self, g, class_property_map, property_constraints, property_graph, context_terms=None, rules=None):
+        """Return the shape model for the selection, rebuilding only the affected classes."""
+        property_constraints = resolve_constraints(g, class_property_map, property_constraints, property_graph, rules)
+        index = self.index = OntologyIndex.build(g, class_property_map, property_graph, base=self.index)
+        shacl_namespace = namespaces.get("ceds", Namespace("http://ceds.ed.gov/terms#"))  # Default to CEDS namespace
+
+        shapes = ShapeModel(namespaces)
+        fragments = {}
+        rebuilt = 0
+        for class_uri, properties in class_property_map.items():
+            if not properties:
+                continue
+            keys = (f"{class_uri}::{prop_uri}" for prop_uri in properties)
+            constraints = {key: property_constraints[key] for key in keys if key in property_constraints}
+            inputs = (
+                str(shacl_namespace),
+                index.class_inputs(class_uri, properties),
+                tuple(str(range_uri) in class_property_map
+                      for prop_uri in sorted(properties, key=str) for range_uri in index.ranges_of(prop_uri)),
+                json.dumps(constraints, sort_keys=True, default=str)
+            )
+
+            cached = self.fragments.get(class_uri)
+            if cached is None or cached[0] != inputs:
+                fragment, fragment_terms = ShapeModel(), {}
+                create_node_shape(fragment, index, class_uri, {}, shacl_namespace, fragment_terms)
+                create_property_shapes(fragment, index, class_uri, properties, class_property_map,
+                                       shacl_namespace, constraints, fragment_terms)
+                cached = (inputs, fragment, fragment_terms)
+                rebuilt += 1
+            fragments[class_uri] = cached
+
+            shapes.merge(cached[1])
+            if context_terms is not None:
+                for term, (uri, is_iri) in cached[2].items():
+                    add_context_term(context_terms, term, uri, is_iri)
+
+        self.fragments = fragments
+        logger.info(f"Rebuilt shapes for {rebuilt} of {len(fragments)} classes")
+        return shapes